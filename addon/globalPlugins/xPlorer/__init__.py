@@ -81,6 +81,7 @@ FolderInfoManager = _safe_import_module('folderInfo', 'FolderInfoManager')
 CaseConverter = _safe_import_module('case', 'CaseConverter')
 FolderCreationDialog = _safe_import_module('folder_creation_dialog', 'FolderCreationDialog')
 type_clipboard_into_rename_if_suitable = _safe_import_module('folder_creator', 'type_clipboard_into_rename_if_suitable')
+SizePrewarmer = _safe_import_module('sizePrewarmer', 'SizePrewarmer')
 
 log.debug("xPlorer: All modules processed")
 
@@ -105,6 +106,9 @@ _robocopy_timer = None
 
 _double_tap_threshold = 0.5
 
+# Focus has to rest in a folder this long before its children are pre-warmed
+_prewarm_delay_ms = 1500
+
 class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 	scriptCategory = _("xPlorer")
 
@@ -131,6 +135,8 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 			self.contextMenuManager = ContextMenuManager(self) if ContextMenuManager else None
 			self.folderInfo = FolderInfoManager(self) if FolderInfoManager else None
 			self.caseConverter = CaseConverter() if CaseConverter else None
+			self.sizePrewarmer = SizePrewarmer() if SizePrewarmer else None
+			self._prewarm_timer = None
 
 			self._last_window = None
 			self._last_window_hwnd = None
@@ -165,7 +171,8 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 			gui.settingsDialogs.NVDASettingsDialog.categoryClasses.remove(xPlorerSettingsPanel)
 
 			for mgr in (self.fileOps, self.compression, self.selection,
-						self.robocopy, self.createFileManager, self.folderInfo):
+						self.robocopy, self.createFileManager, self.folderInfo,
+						self.sizePrewarmer):
 				if mgr and hasattr(mgr, 'cleanup'):
 					mgr.cleanup()
 
@@ -188,6 +195,9 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 			if timer:
 				timer.Stop()
 		_compress_timer = _copy_timer = _invert_timer = _robocopy_timer = None
+		if self._prewarm_timer:
+			self._prewarm_timer.Stop()
+			self._prewarm_timer = None
 
 	def _invalidatePathCache(self):
 		"""Clear cached explorer path so the next retrieval re-fetches from COM."""
@@ -373,6 +383,33 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 	def _getCurrentPath(self):
 		return self._getCurrentPathFromExplorer()
 
+	def _schedulePrewarm(self):
+		if not self.sizePrewarmer:
+			return
+		if self._prewarm_timer:
+			self._prewarm_timer.Stop()
+		self._prewarm_timer = core.callLater(_prewarm_delay_ms, self._prewarmCurrentFolder)
+
+	def _stopPrewarm(self):
+		"""Stop the pending prewarm and the background walk once focus leaves Explorer."""
+		if self._prewarm_timer:
+			self._prewarm_timer.Stop()
+			self._prewarm_timer = None
+		if self.sizePrewarmer:
+			self.sizePrewarmer.stop()
+
+	def _prewarmCurrentFolder(self):
+		self._prewarm_timer = None
+		from .config import loadConfig
+		if not loadConfig().get("prewarmFolderSizes", False):
+			self.sizePrewarmer.stop()
+			return
+		path = self._getCurrentPathFromExplorer()
+		if path:
+			self.sizePrewarmer.folder_entered(path)
+		else:
+			self.sizePrewarmer.stop()
+
 	def _getSelectedItems(self):
 		if self.manager._foregroundTransition:
 			log.debug("Foreground transition active, skipping selected items")
@@ -563,6 +600,16 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 			core.callLater(50, self._executeWithSilence, self.compression.compressZip)
 		_tap_count_compress = 0
 
+	def script_sayCompressionJobs(self, gesture):
+		if not self.compression:
+			ui.message(_("Compression manager not available"))
+			return
+		self.compression.sayJobsStatus()
+
+	script_sayCompressionJobs.__doc__ = _("Say the status of compression and extraction jobs")
+	script_sayCompressionJobs.category = _("xPlorer")
+	script_sayCompressionJobs.gestures = ["kb(desktop):NVDA+shift+j"]
+
 	def script_robocopyMultitap(self, gesture):
 		if not self.robocopy:
 			ui.message(_("Robocopy manager not available"))
@@ -779,6 +826,9 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 						self._last_window_hwnd = None
 					if obj.windowHandle != self._cached_explorer_hwnd:
 						self._invalidatePathCache()
+				self._schedulePrewarm()
+			else:
+				self._stopPrewarm()
 			self.manager.event_gainFocus(obj, nextHandler)
 		except Exception as e:
 			log.error(f"event_gainFocus error: {e}")
@@ -0,0 +1,66 @@
+# archiveFormats.py
+
+import os
+from collections import namedtuple
+
+FORMAT_ZIP = "zip"
+FORMAT_7Z = "7z"
+FORMAT_TAR_GZ = "tar.gz"
+FORMAT_TAR_XZ = "tar.xz"
+TAR_FORMATS = (FORMAT_TAR_GZ, FORMAT_TAR_XZ)
+# Formats only 7-Zip can write
+SEVEN_ZIP_ONLY_FORMATS = (FORMAT_7Z,)
+# Tar archives, compressed or not, which xPlorer extracts itself
+TAR_ARCHIVE_EXTENSIONS = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+# sevenZipLevel: -mx; zlibLevel: deflate for zip and gzip; xzPreset: lzma preset for tar.xz
+PresetLevels = namedtuple("PresetLevels", ("sevenZipLevel", "zlibLevel", "xzPreset"))
+PRESET_LEVELS = {
+	"fastest": PresetLevels(1, 1, 1),
+	"balanced": PresetLevels(5, 6, 6),
+	"smallest": PresetLevels(9, 9, 9),
+}
+DEFAULT_PRESET = "balanced"
+
+
+def archiveExtension(archiveFormat):
+	return "." + archiveFormat
+
+
+def presetLevels(preset):
+	return PRESET_LEVELS.get(preset, PRESET_LEVELS[DEFAULT_PRESET])
+
+
+def sevenZipSwitches(archiveFormat, preset, profile=None):
+	"""7-Zip switches for the archive type, level, threads and method; 7z archives are solid.
+
+	Without a profile, or where an EngineProfile leaves them unset, the preset's
+	level, every core and 7-Zip's default method are used.
+	"""
+	level = presetLevels(preset).sevenZipLevel
+	threads = "on"
+	method = ""
+	if profile:
+		if profile.level is not None:
+			level = profile.level
+		if profile.threads:
+			threads = str(profile.threads)
+		method = profile.method
+	switches = ["-t" + archiveFormat, f"-mx{level}", f"-mmt={threads}"]
+	if method:
+		switches.append(f"-mm={method}")
+	if archiveFormat == FORMAT_7Z:
+		switches.append("-ms=on")
+	return switches
+
+
+def isTarArchive(path):
+	return path.lower().endswith(TAR_ARCHIVE_EXTENSIONS)
+
+
+def stripArchiveExtension(name, extensions):
+	"""name without the longest of extensions it ends with, or without its last extension."""
+	matches = [ext for ext in extensions if name.lower().endswith(ext)]
+	if matches:
+		return name[:-len(max(matches, key=len))]
+	return os.path.splitext(name)[0]
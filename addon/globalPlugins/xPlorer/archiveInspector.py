@@ -0,0 +1,165 @@
+# archiveInspector.py
+
+import os
+import zlib
+import struct
+import zipfile
+from collections import namedtuple
+import addonHandler
+from .archivePool import ZipReaderPool, READ_CHUNK_SIZE
+from .zipWriter import CENTRAL_HEADER, END_RECORD, ZIP64_END_RECORD, ZIP64_END_LOCATOR, ZIP64_EXTRA_ID, FLAG_UTF8
+
+addonHandler.initTranslation()
+
+# Small members are tested in batches, so a hundred thousand tiny files do not cost a task each
+BATCH_MAX_BYTES = 4 * 1024 * 1024
+BATCH_MAX_MEMBERS = 256
+# The end record is followed by a comment of at most 64 KB
+MAX_END_SEARCH = END_RECORD.size + 0xFFFF
+FLAG_ENCRYPTED = 0x1
+
+# name: with forward slashes; dosDate and dosTime are kept raw and converted only when shown
+ArchiveEntry = namedtuple("ArchiveEntry", ("name", "fileSize", "compressedSize", "crc", "method", "flags", "dosDate", "dosTime", "offset"))
+# error: None when the member read back intact
+TestResult = namedtuple("TestResult", ("name", "fileSize", "error"))
+
+
+def entryTime(entry):
+	"""(year, month, day, hour, minute, second) of an ArchiveEntry."""
+	d, t = entry.dosDate, entry.dosTime
+	return ((d >> 9) + 1980, (d >> 5) & 0xF, d & 0x1F, t >> 11, (t >> 5) & 0x3F, (t & 0x1F) * 2)
+
+
+def isDirectoryEntry(entry):
+	return entry.name.endswith("/")
+
+
+def _findEndRecord(f):
+	"""(central directory offset, size, member count) from the end records."""
+	f.seek(0, os.SEEK_END)
+	fileSize = f.tell()
+	searchSize = min(fileSize, MAX_END_SEARCH)
+	f.seek(fileSize - searchSize)
+	tail = f.read(searchSize)
+	position = tail.rfind(b"PK\x05\x06")
+	if position < 0 or position + END_RECORD.size > len(tail):
+		raise zipfile.BadZipFile("No end of central directory record")
+	_sig, _disk, _startDisk, _diskCount, count, size, offset, _commentLength = END_RECORD.unpack_from(tail, position)
+	locator = position - ZIP64_END_LOCATOR.size
+	if locator >= 0 and tail[locator:locator + 4] == b"PK\x06\x07":
+		_sig, _disk, zip64Offset, _disks = ZIP64_END_LOCATOR.unpack_from(tail, locator)
+		f.seek(zip64Offset)
+		record = f.read(ZIP64_END_RECORD.size)
+		if len(record) == ZIP64_END_RECORD.size and record[:4] == b"PK\x06\x06":
+			_sig, _size, _made, _needed, _disk, _startDisk, _diskCount, count, size, offset = ZIP64_END_RECORD.unpack(record)
+	return offset, size, count
+
+
+def _zip64Values(extra, fileSize, compressedSize, offset):
+	"""Replace the 0xFFFFFFFF fields with their values from the Zip64 extra field."""
+	position = 0
+	while position + 4 <= len(extra):
+		fieldId, length = struct.unpack_from("<2H", extra, position)
+		if fieldId == ZIP64_EXTRA_ID:
+			values = iter(struct.unpack_from(f"<{length // 8}Q", extra, position + 4))
+			if fileSize == 0xFFFFFFFF:
+				fileSize = next(values, fileSize)
+			if compressedSize == 0xFFFFFFFF:
+				compressedSize = next(values, compressedSize)
+			if offset == 0xFFFFFFFF:
+				offset = next(values, offset)
+			break
+		position += 4 + length
+	return fileSize, compressedSize, offset
+
+
+def readCentralDirectory(zipPath):
+	"""Every ArchiveEntry of a zip, read from its central directory alone.
+
+	The whole directory is read with one call and parsed with struct, without
+	building zipfile's ZipInfo objects, which keeps a listing of a hundred
+	thousand members well below a second. No member data is read.
+	"""
+	with open(zipPath, "rb") as f:
+		offset, size, count = _findEndRecord(f)
+		f.seek(offset)
+		directory = f.read(size)
+	entries = []
+	headerSize = CENTRAL_HEADER.size
+	position = 0
+	unpack = CENTRAL_HEADER.unpack_from
+	while position + headerSize <= len(directory):
+		(signature, _made, _system, _needed, _needSystem, flags, method, dosTime, dosDate, crc,
+			compressedSize, fileSize, nameLength, extraLength, commentLength,
+			_disk, _internal, _external, headerOffset) = unpack(directory, position)
+		if signature != b"PK\x01\x02":
+			raise zipfile.BadZipFile(f"Bad central directory header at entry {len(entries)}")
+		nameStart = position + headerSize
+		rawName = directory[nameStart:nameStart + nameLength]
+		name = rawName.decode("utf-8" if flags & FLAG_UTF8 else "cp437", errors="replace")
+		if 0xFFFFFFFF in (fileSize, compressedSize, headerOffset):
+			extraStart = nameStart + nameLength
+			fileSize, compressedSize, headerOffset = _zip64Values(directory[extraStart:extraStart + extraLength], fileSize, compressedSize, headerOffset)
+		entries.append(ArchiveEntry(name, fileSize, compressedSize, crc, method, flags, dosDate, dosTime, headerOffset))
+		position = nameStart + nameLength + extraLength + commentLength
+	if len(entries) != count:
+		raise zipfile.BadZipFile(f"Central directory lists {len(entries)} of {count} members")
+	return entries
+
+
+class ParallelZipTester(ZipReaderPool):
+	"""Checks the CRC of every member of a zip, several members at a time.
+
+	Each member is inflated without writing anything, and zipfile compares its
+	CRC once the last byte is read. Small members go to the pool in batches.
+	Progress is counted in uncompressed bytes after every chunk.
+	"""
+
+	def _testMember(self, info):
+		"""Runs on a worker thread. The error text, or None when the member is intact."""
+		if info.flag_bits & FLAG_ENCRYPTED:
+			return _("encrypted, not checked")
+		try:
+			with self._archive().open(info) as source:
+				while not self._cancelled():
+					chunk = source.read(READ_CHUNK_SIZE)
+					if not chunk:
+						break
+					self._addBytes(len(chunk))
+		except (zipfile.BadZipFile, zlib.error, NotImplementedError, EOFError, OSError) as e:
+			return str(e)
+		return None
+
+	def _testBatch(self, infos):
+		return [self._testMember(info) for info in infos]
+
+	def _batches(self, infos):
+		"""(index of the first member, members) in groups of about BATCH_MAX_BYTES."""
+		start = 0
+		batch = []
+		batchBytes = 0
+		for index, info in enumerate(infos):
+			if batch and (batchBytes + info.file_size > BATCH_MAX_BYTES or len(batch) >= BATCH_MAX_MEMBERS):
+				yield start, batch
+				start, batch, batchBytes = index, [], 0
+			batch.append(info)
+			batchBytes += info.file_size
+		if batch:
+			yield start, batch
+
+	def run(self):
+		"""A TestResult for every file, in archive order, or None if cancelled."""
+		with zipfile.ZipFile(self.zipPath) as archive:
+			infos = [info for info in archive.infolist() if not info.is_dir()]
+		self.totalBytes = sum(info.file_size for info in infos)
+		results = [None] * len(infos)
+
+		def collect(start, errors):
+			for index, error in enumerate(errors, start):
+				info = infos[index]
+				results[index] = TestResult(info.filename, info.file_size, error)
+
+		tasks = ((start, self._testBatch, (batch,)) for start, batch in self._batches(infos))
+		if not self._runTasks(tasks, "xPlorerZipTest", collect):
+			return None
+		return results
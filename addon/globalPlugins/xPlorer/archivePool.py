@@ -0,0 +1,98 @@
+# archivePool.py
+
+import os
+import zipfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from logHandler import log
+
+READ_CHUNK_SIZE = 1024 * 1024
+POLL_INTERVAL = 0.2
+# Tasks queued on the pool at once, per worker, so waiting stays cheap with many small members
+INFLIGHT_PER_WORKER = 4
+
+
+def defaultWorkers():
+	return max(1, min(os.cpu_count() or 1, 16))
+
+
+class ZipReaderPool:
+	"""Base of the engines that read the members of one zip on a thread pool.
+
+	Every worker thread opens the archive itself through _archive(), so reading
+	and inflating members never wait on a shared file position. Workers add what
+	they read to bytesDone with _addBytes(), and _runTasks() reports it through
+	onProgress(bytesDone, totalBytes) from the thread running it.
+	"""
+
+	def __init__(self, zipPath, maxWorkers=None, isCancelled=None, onProgress=None):
+		self.zipPath = zipPath
+		self.maxWorkers = maxWorkers or defaultWorkers()
+		self.isCancelled = isCancelled
+		self.onProgress = onProgress
+		self.totalBytes = 0
+		self.bytesDone = 0
+		self._lock = threading.Lock()
+		self._local = threading.local()
+		self._archives = []
+
+	def _cancelled(self):
+		return bool(self.isCancelled and self.isCancelled())
+
+	def _archive(self):
+		archive = getattr(self._local, "archive", None)
+		if archive is None:
+			archive = zipfile.ZipFile(self.zipPath)
+			self._local.archive = archive
+			with self._lock:
+				self._archives.append(archive)
+		return archive
+
+	def _addBytes(self, count):
+		with self._lock:
+			self.bytesDone += count
+
+	def _runTasks(self, tasks, threadNamePrefix, onResult=None):
+		"""Run tasks, (key, function, args) tuples, on maxWorkers threads.
+
+		Tasks are taken from the iterable only as the pool has room for them, so
+		an archive of a million members never queues a million futures.
+		onResult(key, result) is called for every finished task. Returns False if
+		cancelled; the first error raised by a task is raised again.
+		"""
+		executor = ThreadPoolExecutor(max_workers=self.maxWorkers, thread_name_prefix=threadNamePrefix)
+		try:
+			queued = iter(tasks)
+			pending = {}
+			maxInflight = self.maxWorkers * INFLIGHT_PER_WORKER
+			while True:
+				for key, function, args in queued:
+					pending[executor.submit(function, *args)] = key
+					if len(pending) >= maxInflight:
+						break
+				if not pending:
+					break
+				done, _waiting = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+				for future in done:
+					key = pending.pop(future)
+					error = future.exception()
+					if error:
+						for other in pending:
+							other.cancel()
+						raise error
+					if onResult:
+						onResult(key, future.result())
+				if self._cancelled():
+					for future in pending:
+						future.cancel()
+					return False
+				if self.onProgress:
+					self.onProgress(self.bytesDone, self.totalBytes)
+			return True
+		finally:
+			executor.shutdown(wait=True)
+			for archive in self._archives:
+				try:
+					archive.close()
+				except OSError as e:
+					log.debug(f"Cannot close {self.zipPath}: {e}")
@@ -0,0 +1,73 @@
+# archiveReport.py
+
+import wx
+import gui
+import gui.guiHelper
+import ui
+import addonHandler
+from logHandler import log
+
+addonHandler.initTranslation()
+
+
+class _VirtualList(wx.ListCtrl):
+	"""Report list that asks for the text of the rows on screen only, so a hundred thousand rows open at once."""
+
+	def __init__(self, parent, columns, items, cellText, size):
+		super().__init__(parent, style=wx.LC_REPORT | wx.LC_SINGLE_SEL | wx.LC_VIRTUAL, size=size)
+		self.items = items
+		self.cellText = cellText
+		for column, label in enumerate(columns):
+			self.InsertColumn(column, label, width=300 if column == 0 else 120)
+		self.SetItemCount(len(items))
+
+	def OnGetItemText(self, item, column):
+		return self.cellText(self.items[item], column)
+
+
+class ArchiveReportDialog(wx.Dialog):
+	"""A summary with totals above a navigable list of archive members.
+
+	cellText(item, column) formats one cell of items on demand.
+	"""
+
+	def __init__(self, parent, title, summary, columns, items, cellText):
+		super().__init__(parent, title=title)
+		main_sizer = wx.BoxSizer(wx.VERTICAL)
+		s_helper = gui.guiHelper.BoxSizerHelper(self, orientation=wx.VERTICAL)
+
+		summary_ctrl = s_helper.addLabeledControl(_("Summary:"), wx.TextCtrl, value=summary, style=wx.TE_MULTILINE | wx.TE_READONLY, size=(600, 90))
+		label = wx.StaticText(self, label=_("Members:"))
+		members_list = _VirtualList(self, columns, items, cellText, size=(600, 300))
+		s_helper.addItem(label)
+		s_helper.addItem(members_list, flag=wx.EXPAND)
+		if items:
+			members_list.Select(0)
+			members_list.Focus(0)
+
+		btn_sizer = self.CreateButtonSizer(wx.CLOSE)
+		s_helper.addItem(btn_sizer, flag=wx.ALIGN_CENTER)
+
+		main_sizer.Add(s_helper.sizer, 1, wx.EXPAND | wx.ALL, 10)
+		self.SetSizer(main_sizer)
+		main_sizer.Fit(self)
+		self.CentreOnScreen()
+		self.SetEscapeId(wx.ID_CLOSE)
+		summary_ctrl.SetFocus()
+
+
+def showArchiveReport(title, summary, columns, items, cellText):
+	"""Show an ArchiveReportDialog modally. Runs on the main thread."""
+	dialog = None
+	try:
+		gui.mainFrame.prePopup()
+		dialog = ArchiveReportDialog(gui.mainFrame, title, summary, columns, items, cellText)
+		dialog.Raise()
+		dialog.ShowModal()
+	except Exception as e:
+		log.error(f"Error showing archive report: {e}")
+		ui.message(_("Error opening archive report"))
+	finally:
+		if dialog:
+			dialog.Destroy()
+		gui.mainFrame.postPopup()
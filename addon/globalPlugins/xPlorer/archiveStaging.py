@@ -0,0 +1,155 @@
+# archiveStaging.py
+
+import os
+import shutil
+import ctypes
+import tempfile
+from logHandler import log
+from .splitVolumes import volumePath, existingVolumes, removeVolumes
+
+# An archive being written in its destination folder carries this suffix until it is complete
+PARTIAL_SUFFIX = ".partial"
+COPY_BLOCK_SIZE = 8 * 1024 * 1024
+DRIVE_REMOTE = 4
+STAGE_NEVER = "never"
+STAGE_NETWORK = "network"
+STAGE_ALWAYS = "always"
+
+
+def isNetworkPath(path):
+	"""True for UNC paths and folders on mapped network drives."""
+	path = os.path.abspath(path)
+	if path.startswith("\\\\"):
+		return True
+	drive = os.path.splitdrive(path)[0]
+	if not drive:
+		return False
+	try:
+		return ctypes.windll.kernel32.GetDriveTypeW(drive + "\\") == DRIVE_REMOTE
+	except (OSError, AttributeError) as e:
+		log.debug(f"Cannot read the drive type of {drive}: {e}")
+		return False
+
+
+def shouldStage(destination, mode):
+	"""Whether an archive for destination is built in the staging folder, by the staging setting."""
+	if mode == STAGE_ALWAYS:
+		return True
+	return mode == STAGE_NETWORK and isNetworkPath(os.path.dirname(destination))
+
+
+class ArchiveStaging:
+	"""Where an archive is written until it is complete, and how it then reaches its destination.
+
+	Engines write to path, never to the destination. With a stagingFolder, path
+	lies in a private folder on local storage, where the many small and seeking
+	writes of an archive are fast, and publish() copies the finished archive to
+	the destination in large sequential blocks under a partial name before
+	renaming it into place. Without one, path is the destination with
+	PARTIAL_SUFFIX, and publish() only renames it. Either way a failed or
+	cancelled job leaves no half-written archive behind once discard() runs.
+	Split archives are published volume by volume the same way.
+	"""
+
+	def __init__(self, destination, stagingFolder=None, volumeSize=0):
+		self.destination = destination
+		self.volumeSize = volumeSize
+		self._stageDir = None
+		if stagingFolder is not None:
+			try:
+				self._stageDir = tempfile.mkdtemp(prefix="xplorer_", dir=stagingFolder or None)
+			except OSError as e:
+				log.warning(f"Cannot create a staging folder in {stagingFolder or tempfile.gettempdir()}, writing in place: {e}")
+		if self._stageDir:
+			self.path = os.path.join(self._stageDir, os.path.basename(destination))
+		else:
+			self.path = destination + PARTIAL_SUFFIX
+
+	@property
+	def staged(self):
+		return self._stageDir is not None
+
+	def stageExisting(self, onProgress=None, isCancelled=None):
+		"""Make path start as a copy of the archive already at the destination, for tools that update in place.
+
+		Without staging, path becomes the destination itself: 7-Zip writes an
+		update to a temporary file of its own and replaces the archive only
+		when done. Returns False if cancelled.
+		"""
+		if not self.staged:
+			self.path = self.destination
+			return True
+		total = os.path.getsize(self.destination)
+		return self._copy(self.destination, self.path, onProgress, isCancelled, 0, total) is not None
+
+	def publish(self, onProgress=None, isCancelled=None):
+		"""Move the finished archive to its destination.
+
+		onProgress(bytesDone, totalBytes) follows the copy out of the staging
+		folder. Returns False, leaving nothing new at the destination, if cancelled.
+		"""
+		if self.path == self.destination:
+			return True
+		if self.volumeSize:
+			sources = existingVolumes(self.path)
+			targets = [volumePath(self.destination, index) for index in range(len(sources))]
+		else:
+			sources = [self.path]
+			targets = [self.destination]
+		if not self.staged:
+			for source, target in zip(sources, targets):
+				os.replace(source, target)
+			return True
+		partials = [target + PARTIAL_SUFFIX for target in targets]
+		total = sum(os.path.getsize(source) for source in sources)
+		done = 0
+		try:
+			for source, partial in zip(sources, partials):
+				done = self._copy(source, partial, onProgress, isCancelled, done, total)
+				if done is None:
+					self._removeFiles(partials)
+					return False
+		except Exception:
+			self._removeFiles(partials)
+			raise
+		# Every volume is complete before the first one takes its final name
+		for partial, target in zip(partials, targets):
+			os.replace(partial, target)
+		return True
+
+	def discard(self):
+		"""Remove whatever is left of the work files. Safe to call after publish()."""
+		if self._stageDir:
+			shutil.rmtree(self._stageDir, ignore_errors=True)
+			self._stageDir = None
+		elif self.path != self.destination:
+			if self.volumeSize:
+				removeVolumes(self.path)
+			else:
+				self._removeFiles([self.path])
+
+	def _copy(self, source, target, onProgress, isCancelled, done, total):
+		"""Copy source to target in large blocks. Returns the bytes done so far, or None if cancelled."""
+		buffer = bytearray(COPY_BLOCK_SIZE)
+		view = memoryview(buffer)
+		with open(source, "rb") as src, open(target, "wb") as dst:
+			while True:
+				if isCancelled and isCancelled():
+					dst.close()
+					self._removeFiles([target])
+					return None
+				length = src.readinto(buffer)
+				if not length:
+					break
+				dst.write(view[:length])
+				done += length
+				if onProgress:
+					onProgress(done, total)
+		return done
+
+	def _removeFiles(self, paths):
+		for path in paths:
+			try:
+				os.remove(path)
+			except OSError:
+				pass
@@ -10,6 +10,7 @@ from logHandler import log
 import addonHandler
 import core
 import time
+from .treeWalker import walkTree
 
 addonHandler.initTranslation()
 
@@ -91,23 +92,21 @@ class CaseConverter:
 		return success
 
 	def _walk_and_rename(self, root_path, convert_func, progress_callback):
+		folders = [(0, root_path)]
+		for scan in walkTree(root_path, isCancelled=lambda: self._should_stop):
+			folders.extend((scan.depth + 1, path) for path in scan.subdirs)
+		# Deepest folders first, so a rename never invalidates a path that is still waiting
+		folders.sort(key=lambda item: item[0], reverse=True)
 		processed = 0
 		success = 0
-		if self._rename_folder_only(root_path, convert_func):
-			success += 1
-		processed += 1
-		for current_root, dirs, _ in os.walk(root_path):
+		for _depth, old_path in folders:
 			if self._should_stop:
 				break
-			for d in dirs[:]:
-				if self._should_stop:
-					break
-				old_path = os.path.join(current_root, d)
-				if self._rename_folder_only(old_path, convert_func):
-					success += 1
-				processed += 1
-				if processed % 20 == 0:
-					wx.CallAfter(progress_callback, processed)
+			if self._rename_folder_only(old_path, convert_func):
+				success += 1
+			processed += 1
+			if processed % 20 == 0:
+				wx.CallAfter(progress_callback, processed)
 		return success
 
 	def _run_conversion_streaming(self, root_paths, convert_func, success_template):
@@ -0,0 +1,152 @@
+# compressionEstimate.py
+
+import os
+import time
+import lzma
+import zlib
+import random
+import zipfile
+from collections import namedtuple
+from .compressionManifest import CompressionManifest
+from .compressionPolicy import chooseMethod
+from .archiveFormats import FORMAT_TAR_XZ, FORMAT_7Z, presetLevels
+from .treeEstimate import estimateTree
+from .sizeIndex import getSizeIndex
+
+# Time for listing the selection; past it the totals are extrapolated from the size index
+WALK_BUDGET = 1.0
+# Time and bytes for reading and compressing samples
+SAMPLE_BUDGET = 0.8
+SAMPLE_MAX_BYTES = 16 * 1024 * 1024
+SAMPLE_CHUNK_SIZE = 256 * 1024
+MAX_SAMPLES = 64
+# Bytes a zip adds per member for its local and central headers, names aside
+MEMBER_OVERHEAD = 76
+
+# totalBytes, fileCount: of the selection; exactTotals: False when they were extrapolated
+# archiveBytes: expected archive size; seconds: expected duration on this machine, None when nothing could be sampled
+# manifest: the complete CompressionManifest of the selection, None when its walk ran out of time
+CompressionEstimate = namedtuple("CompressionEstimate", ("totalBytes", "fileCount", "archiveBytes", "seconds", "exactTotals", "sampledBytes", "manifest"))
+
+
+def _sampleCompressor(archiveFormat, preset):
+	"""A function compressing one chunk the way the archive will, close enough to time it."""
+	levels = presetLevels(preset)
+	if archiveFormat in (FORMAT_TAR_XZ, FORMAT_7Z):
+		lzmaPreset = levels.xzPreset if archiveFormat == FORMAT_TAR_XZ else levels.sevenZipLevel
+		# A dictionary larger than a chunk changes nothing for it, but the high presets
+		# would allocate and clear up to 64 MB for every sample
+		filters = [{"id": lzma.FILTER_LZMA2, "preset": lzmaPreset, "dict_size": SAMPLE_CHUNK_SIZE}]
+		return lambda data: lzma.compress(data, format=lzma.FORMAT_RAW, filters=filters)
+	return lambda data: zlib.compress(data, levels.zlibLevel)
+
+
+def _fallbackTotals(selectedItems, deadline):
+	"""(totalBytes, fileCount) from the size index, measured totals first, probes otherwise."""
+	totalBytes = 0
+	fileCount = 0
+	index = getSizeIndex()
+	folders = []
+	for item in selectedItems:
+		if os.path.isfile(item):
+			totalBytes += os.path.getsize(item)
+			fileCount += 1
+			continue
+		totals = index.lastTotals(item)
+		if totals:
+			totalBytes += totals[0]
+			fileCount += totals[1]
+		else:
+			folders.append(item)
+	for position, folder in enumerate(folders):
+		# Share what is left of the budget between the folders still unknown
+		share = max(0.05, (deadline - time.monotonic()) / (len(folders) - position))
+		estimate = estimateTree(folder, index.lookup, time.monotonic() + share)
+		if estimate:
+			totalBytes += estimate.totalBytes
+			fileCount += estimate.fileCount
+	return totalBytes, fileCount
+
+
+def estimateArchive(selectedItems, rules, archiveFormat, preset, storeIncompressible=True, manifest=None, workers=None, isCancelled=None, rng=None):
+	"""Estimate the archive size and duration of compressing selectedItems, within about two seconds.
+
+	The selection is listed into a CompressionManifest for at most WALK_BUDGET
+	seconds; a walk that does not finish in time is completed from the size
+	index. Chunks of files drawn with a probability proportional to their size
+	are then read and compressed until SAMPLE_BUDGET or SAMPLE_MAX_BYTES runs
+	out, so the mean of their ratios is the byte weighted ratio of the whole
+	selection. The measured speeds, with workers compressing at once, give the
+	duration. Pass manifest when one was built already; a complete one is handed
+	back in the estimate, so the compression can reuse it. Returns None if cancelled.
+	"""
+	rng = rng or random.Random()
+	workers = workers or max(1, min(os.cpu_count() or 1, 16))
+	start = time.monotonic()
+	exactTotals = True
+	if manifest is None:
+		walkDeadline = start + WALK_BUDGET
+		timedOut = []
+
+		def stopWalk():
+			if time.monotonic() > walkDeadline:
+				timedOut.append(True)
+				return True
+			return bool(isCancelled and isCancelled())
+
+		manifest = CompressionManifest.build(selectedItems, rules, stopWalk)
+		if isCancelled and isCancelled():
+			return None
+		exactTotals = not timedOut
+	if exactTotals:
+		totalBytes, fileCount = manifest.totalSize, len(manifest)
+	else:
+		totalBytes, fileCount = _fallbackTotals(selectedItems, time.monotonic() + WALK_BUDGET / 2)
+
+	compress = _sampleCompressor(archiveFormat, preset)
+	sampleDeadline = time.monotonic() + SAMPLE_BUDGET
+	sampledBytes = 0
+	compressedBytes = 0
+	readSeconds = 0.0
+	compressSeconds = 0.0
+	ratios = []
+	if manifest.totalSize:
+		for index in rng.choices(range(len(manifest)), weights=manifest.sizes, k=MAX_SAMPLES):
+			if time.monotonic() > sampleDeadline or sampledBytes >= SAMPLE_MAX_BYTES:
+				break
+			if isCancelled and isCancelled():
+				return None
+			entry = manifest[index]
+			offset = rng.randrange(max(1, entry.size - SAMPLE_CHUNK_SIZE + 1))
+			began = time.perf_counter()
+			try:
+				with open(entry.path, "rb") as f:
+					f.seek(offset)
+					data = f.read(SAMPLE_CHUNK_SIZE)
+			except OSError:
+				continue
+			if not data:
+				continue
+			readSeconds += time.perf_counter() - began
+			sampledBytes += len(data)
+			if storeIncompressible and chooseMethod(entry.path, entry.size, data) == zipfile.ZIP_STORED:
+				ratios.append(1.0)
+				continue
+			began = time.perf_counter()
+			size = len(compress(data))
+			compressSeconds += time.perf_counter() - began
+			compressedBytes += len(data)
+			ratios.append(min(1.0, size / len(data)))
+	ratio = sum(ratios) / len(ratios) if ratios else 1.0
+	archiveBytes = int(totalBytes * ratio) + fileCount * MEMBER_OVERHEAD
+	# Compressing runs on every worker at once while reading stays one stream, so the slower of the two sets the pace
+	readRate = sampledBytes / readSeconds if readSeconds else 0
+	compressRate = compressedBytes / compressSeconds * workers if compressSeconds else 0
+	compressedShare = compressedBytes / sampledBytes if sampledBytes else 1.0
+	seconds = None
+	if readRate or compressRate:
+		seconds = max(
+			totalBytes / readRate if readRate else 0,
+			totalBytes * compressedShare / compressRate if compressRate else 0,
+		)
+	return CompressionEstimate(totalBytes, fileCount, archiveBytes, seconds, exactTotals, sampledBytes, manifest if exactTotals else None)
@@ -0,0 +1,281 @@
+# compressionJobs.py
+
+import os
+import wx
+import gui
+import ui
+import tones
+import threading
+from collections import deque
+from logHandler import log
+import addonHandler
+from .fileOperations import format_size
+
+addonHandler.initTranslation()
+
+DEFAULT_MAX_RUNNING = 2
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+
+
+class CompressionJob:
+	"""One compression or extraction with its own progress dialog, percentage and cancel state.
+
+	target(job, *args) runs on the job's own thread and reports through
+	updateProgress() and job.cancelled, so jobs running side by side never share
+	a dialog or a cancel flag.
+	"""
+
+	def __init__(self, title, name, target, args):
+		self.title = title
+		# What the job works on, as spoken by the jobs status
+		self.name = name
+		self.target = target
+		self.args = args
+		self.state = JOB_QUEUED
+		self.cancelled = False
+		self.percent = 0
+		self.progressDialog = None
+		self.thread = None
+		# Threads the built-in engines may use for this job; None lets them use every core
+		self.engineWorkers = None
+		# Source bytes the job works through, once its compress function has listed them
+		self.totalBytes = None
+		self._lastBeepPercent = None
+
+	def isCancelled(self):
+		return self.cancelled
+
+	def cancel(self):
+		self.cancelled = True
+
+	def setTotalBytes(self, totalBytes):
+		self.totalBytes = totalBytes
+
+	def updateProgress(self, percent, message):
+		self.percent = percent
+
+		def do_update():
+			if self.progressDialog:
+				cont, _ignore = self.progressDialog.Update(percent, message)
+				if percent % 10 == 0 and percent != self._lastBeepPercent:
+					self._lastBeepPercent = percent
+					tones.beep(800 + percent * 2, 50)
+				if not cont:
+					self.cancelled = True
+		wx.CallAfter(do_update)
+
+	def start(self, onFinished):
+		"""Open the progress dialog and start the thread. Runs on the main thread."""
+		style = wx.PD_CAN_ABORT | wx.PD_ELAPSED_TIME | wx.PD_REMAINING_TIME | wx.STAY_ON_TOP
+		self.state = JOB_RUNNING
+		try:
+			self.progressDialog = wx.ProgressDialog(
+				self.title,
+				_("Starting..."),
+				maximum=100,
+				parent=gui.mainFrame,
+				style=style
+			)
+			self.progressDialog.Raise()
+			wx.CallAfter(self.progressDialog.SetFocus)
+			wx.CallAfter(ui.message, self.title)
+		except Exception as e:
+			log.error(f"Cannot open the progress dialog of {self.name}: {e}")
+
+		def run():
+			try:
+				self.target(self, *self.args)
+			except Exception as e:
+				log.error(f"Job {self.name} failed: {e}")
+			finally:
+				self.state = JOB_DONE
+				wx.CallAfter(self.destroyDialog)
+				onFinished(self)
+
+		self.thread = threading.Thread(target=run, name=f"xPlorerJob {self.name}", daemon=True)
+		self.thread.start()
+
+	def destroyDialog(self):
+		if self.progressDialog:
+			try:
+				self.progressDialog.Destroy()
+			except Exception:
+				pass
+			self.progressDialog = None
+
+
+class BatchProgress:
+	"""Adds the progress of the archives of a batch up into the batch's CompressionJob.
+
+	Every archive reports through its own BatchItemJob, so the compress functions
+	run unchanged for one item of a batch. The bytes of an archive count once its
+	compress function has listed its files; 7-Zip given the selection directly
+	reports only its percentage, so a batch without any listed archive speaks no size.
+	"""
+
+	def __init__(self, job, count):
+		self.job = job
+		self.count = count
+		self.completed = 0
+		# Source bytes of the finished archives
+		self.bytesDone = 0
+		# True once any archive has reported its total bytes
+		self.sized = False
+		self._running = []
+		self._lock = threading.Lock()
+		self._lastMessage = None
+
+	def itemJob(self, engineWorkers=None):
+		item = BatchItemJob(self, engineWorkers)
+		with self._lock:
+			self._running.append(item)
+		return item
+
+	def _itemFinished(self, item):
+		with self._lock:
+			if item in self._running:
+				self._running.remove(item)
+			self.completed += 1
+			self.bytesDone += item.size
+		self.report()
+
+	def report(self):
+		with self._lock:
+			fractions = sum(item.percent for item in self._running) / 100
+			bytesDone = self.bytesDone + sum(item.size * item.percent // 100 for item in self._running)
+			completed = self.completed
+		percent = min(100, int((completed + fractions) * 100 / self.count)) if self.count else 100
+		if self.sized:
+			message = _("{done} of {count} archives, {size} done").format(done=completed, count=self.count, size=format_size(bytesDone))
+		else:
+			message = _("{done} of {count} archives").format(done=completed, count=self.count)
+		if message != self._lastMessage or percent != self.job.percent:
+			self._lastMessage = message
+			self.job.updateProgress(percent, message)
+
+
+class BatchItemJob:
+	"""Stands in for a CompressionJob while one archive of a batch is made.
+
+	Cancelling the batch cancels every archive in it.
+	"""
+
+	def __init__(self, batch, engineWorkers=None):
+		self.batch = batch
+		# Source bytes of the archive, from the manifest of its compress function
+		self.size = 0
+		self.engineWorkers = engineWorkers
+		self.percent = 0
+
+	@property
+	def cancelled(self):
+		return self.batch.job.cancelled
+
+	def isCancelled(self):
+		return self.batch.job.cancelled
+
+	def setTotalBytes(self, totalBytes):
+		self.size = totalBytes
+		self.batch.sized = True
+		self.batch.report()
+
+	def updateProgress(self, percent, message):
+		if percent != self.percent:
+			self.percent = percent
+			self.batch.report()
+
+	def finish(self):
+		self.batch._itemFinished(self)
+
+
+class JobQueue:
+	"""Runs CompressionJobs first come, first served, at most maxRunning() at a time.
+
+	maxRunning is asked again whenever a job could start, so a changed setting
+	applies to the jobs still waiting.
+	"""
+
+	def __init__(self, maxRunning=None):
+		self.maxRunning = maxRunning or (lambda: DEFAULT_MAX_RUNNING)
+		self._lock = threading.Lock()
+		self._waiting = deque()
+		self._running = []
+
+	def submit(self, job):
+		"""Queue job. Returns how many jobs, running or waiting, are ahead of it when it has to wait, otherwise 0."""
+		with self._lock:
+			waiting = sum(1 for other in self._waiting if not other.cancelled)
+			self._waiting.append(job)
+			willWait = waiting or len(self._running) >= max(1, self.maxRunning())
+			ahead = waiting + len(self._running)
+		wx.CallAfter(self._startReady)
+		return ahead if willWait else 0
+
+	def _startReady(self):
+		ready = []
+		with self._lock:
+			limit = max(1, self.maxRunning())
+			while self._waiting and len(self._running) < limit:
+				job = self._waiting.popleft()
+				if job.cancelled:
+					continue
+				self._running.append(job)
+				ready.append(job)
+		for job in ready:
+			job.start(self._onFinished)
+
+	def _onFinished(self, job):
+		with self._lock:
+			if job in self._running:
+				self._running.remove(job)
+		wx.CallAfter(self._startReady)
+
+	def snapshot(self):
+		"""(running jobs, waiting jobs), each in the order they were queued."""
+		with self._lock:
+			return list(self._running), [job for job in self._waiting if not job.cancelled]
+
+	def statusMessage(self):
+		running, waiting = self.snapshot()
+		if not running and not waiting:
+			return _("No compression jobs")
+		parts = []
+		if running:
+			parts.append(_("{count} running").format(count=len(running)))
+			parts.extend(
+				_("{name} {percent}%").format(name=job.name, percent=job.percent)
+				for job in running
+			)
+		if waiting:
+			parts.append(_("{count} waiting").format(count=len(waiting)))
+			parts.extend(job.name for job in waiting)
+		return ", ".join(parts)
+
+	def cancelWaiting(self):
+		"""Cancel the jobs that have not started. Returns how many there were."""
+		with self._lock:
+			jobs = [job for job in self._waiting if not job.cancelled]
+			self._waiting.clear()
+		for job in jobs:
+			job.cancel()
+		return len(jobs)
+
+	def cancelAll(self, timeout=1.0):
+		with self._lock:
+			jobs = list(self._running) + list(self._waiting)
+			self._waiting.clear()
+		for job in jobs:
+			job.cancel()
+			job.destroyDialog()
+		for job in jobs:
+			if job.thread and job.thread.is_alive():
+				job.thread.join(timeout=timeout)
+
+
+def jobName(paths):
+	"""Short spoken name of a job working on paths."""
+	if len(paths) == 1:
+		return os.path.basename(paths[0].rstrip("\\/")) or paths[0]
+	return _("{name} and {count} more").format(name=os.path.basename(paths[0].rstrip("\\/")), count=len(paths) - 1)
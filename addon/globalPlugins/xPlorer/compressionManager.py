@@ -3,141 +3,416 @@
 import ui
 import api
 import os
-import wx
-import gui
 import subprocess
 import zipfile
-from threading import Thread
+from threading import Thread, Lock
 import tones
+import wx
 from logHandler import log
 import addonHandler
 import winUser
 import time
 import core
+import tempfile
+import queue
+import re
+import codecs
+from concurrent.futures import ThreadPoolExecutor
+from .config import loadConfig
+from .exclusionRules import ExclusionRules
+from .gitIgnore import GitIgnoreRules
+from .compressionManifest import CompressionManifest
+from .compressionEstimate import estimateArchive
+from .parallelZip import ParallelZipEngine, ZipMember, readArchiveIndex, isUnchanged
+from .compressionPolicy import isIncompressibleName
+from .parallelUnzip import ParallelUnzipEngine, freePath
+from .tarEngine import TarEngine, TarExtractor
+from .splitVolumes import MB, volumePath, existingVolumes
+from .archiveStaging import ArchiveStaging, shouldStage, STAGE_NEVER
+from .archiveInspector import readCentralDirectory, ParallelZipTester, entryTime, isDirectoryEntry
+from .archiveReport import showArchiveReport
+from .fileOperations import format_size, format_duration
+from .engineProfiles import profileFromConfig, priorityClass
+from .compressionJobs import CompressionJob, JobQueue, BatchProgress, jobName, DEFAULT_MAX_RUNNING
+from .archiveFormats import (
+	FORMAT_ZIP, FORMAT_TAR_XZ, TAR_FORMATS, SEVEN_ZIP_ONLY_FORMATS, TAR_ARCHIVE_EXTENSIONS, DEFAULT_PRESET,
+	archiveExtension, presetLevels, sevenZipSwitches, stripArchiveExtension, isTarArchive
+)
 
 addonHandler.initTranslation()
 
+DEFAULT_STALL_SECONDS = 120
+DEFAULT_BATCH_PARALLEL = 2
+QUEUE_POLL_TIMEOUT = 0.3
+UI_UPDATE_MIN_INTERVAL = 0.15
+# Archives 7-Zip extracts completely in one run. Tar archives are not among them:
+# 7-Zip only takes the gzip, bzip2 or xz layer off, so TarExtractor extracts those
+SEVEN_ZIP_ARCHIVE_EXTENSIONS = (
+	".zip", ".7z", ".rar", ".gz", ".bz2", ".xz", ".cab", ".iso", ".wim", ".arj", ".lzh", ".z", ".001"
+)
+READ_BLOCK_SIZE = 4096
+SEVEN_ZIP_SPLIT_RE = re.compile(r"[\r\n\b]+")
+# A -bsp1 progress line: "percent%", an optional file count, then an update mark and the current file
+SEVEN_ZIP_PROGRESS_RE = re.compile(r"^\s*(\d{1,3})%(?:\s+\d+)?(?:\s+[+=U\-RTD]\s+(.*))?\s*$")
+
 class CompressionManager:
 	def __init__(self, plugin):
 		self.plugin = plugin
-		self.progressDialog = None
-		self.compressThread = None
-		self.cancelled = False
+		self.jobs = JobQueue(lambda: loadConfig().get("maxCompressionJobs", DEFAULT_MAX_RUNNING))
+		# Archives that running jobs are writing, so two jobs never pick the same free name
+		self._reservedPaths = set()
+		self._reservedLock = Lock()
 
 	def cleanup(self):
-		if self.progressDialog:
-			try:
-				self.progressDialog.Destroy()
-			except:
-				pass
-		if self.compressThread and self.compressThread.is_alive():
-			self.compressThread.join(timeout=1.0)
-
-	def _updateProgress(self, percent, message):
-		if self.progressDialog:
-			def do_update():
-				if self.progressDialog:
-					cont, _ignore = self.progressDialog.Update(percent, message)
-					if percent % 10 == 0:
-						tones.beep(800 + percent * 2, 50)
-					if not cont:
-						self.cancelled = True
-			wx.CallAfter(do_update)
-
-	def _compressInBackground(self, sevenZipPath, selectedItems, callback):
-		self.cancelled = False
-		try:
-			if len(selectedItems) == 1:
-				sourcePath = selectedItems[0]
-				if os.path.isfile(sourcePath):
-					baseName = os.path.splitext(os.path.basename(sourcePath))[0]
-				else:
-					baseName = os.path.basename(sourcePath)
-				zipPath = os.path.join(os.path.dirname(sourcePath), baseName + ".zip")
+		self.jobs.cancelAll()
+
+	def sayJobsStatus(self):
+		ui.message(self.jobs.statusMessage())
+
+	def cancelWaitingJobs(self):
+		"""Cancel every job that has not started yet; running jobs are cancelled from their own dialogs."""
+		count = self.jobs.cancelWaiting()
+		if count:
+			ui.message(_("{count} waiting jobs cancelled").format(count=count))
+		else:
+			ui.message(_("No jobs waiting"))
+
+	def _archivePath(self, selectedItems, update=False, extension=".zip"):
+		"""The archive for selectedItems: the existing one when updating, otherwise a free name.
+
+		The path is reserved until _releaseArchivePath, so it is not handed to another job.
+		Returns None when updating an archive another job is still writing.
+		"""
+		if len(selectedItems) == 1:
+			sourcePath = selectedItems[0]
+			if os.path.isfile(sourcePath):
+				baseName = os.path.splitext(os.path.basename(sourcePath))[0]
 			else:
-				folderPath = os.path.dirname(selectedItems[0])
-				folderName = os.path.basename(folderPath)
-				zipPath = os.path.join(folderPath, folderName + ".zip")
-			
-			counter = 1
-			originalZipPath = zipPath
-			while os.path.exists(zipPath):
-				name, ext = os.path.splitext(originalZipPath)
-				zipPath = f"{name} ({counter}){ext}"
-				counter += 1
-				
-			cmd = [sevenZipPath, "a", "-tzip", zipPath]
-			cmd.extend(selectedItems)
-			
-			process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True, creationflags=subprocess.CREATE_NO_WINDOW)
+				baseName = os.path.basename(sourcePath)
+			zipPath = os.path.join(os.path.dirname(sourcePath), baseName + extension)
+		else:
+			folderPath = os.path.dirname(selectedItems[0])
+			folderName = os.path.basename(folderPath)
+			zipPath = os.path.join(folderPath, folderName + extension)
+		with self._reservedLock:
+			if update and zipPath in self._reservedPaths:
+				return None
+			if not update:
+				counter = 1
+				# Count before the whole extension, so "name.tar.gz" becomes "name (1).tar.gz"
+				originalName = zipPath[:-len(extension)]
+				while os.path.exists(zipPath) or os.path.exists(volumePath(zipPath, 0)) or zipPath in self._reservedPaths:
+					zipPath = f"{originalName} ({counter}){extension}"
+					counter += 1
+			self._reservedPaths.add(zipPath)
+		return zipPath
+
+	def _releaseArchivePath(self, zipPath):
+		with self._reservedLock:
+			self._reservedPaths.discard(zipPath)
+
+	def _completedMessage(self, zipPath, updating, volumeSize=0):
+		if updating:
+			return _("Archive updated {name}").format(name=os.path.basename(zipPath))
+		if volumeSize:
+			return _("Compression completed {name}, {count} volumes").format(name=os.path.basename(zipPath), count=len(existingVolumes(zipPath)))
+		return _("Compression completed {name}").format(name=os.path.basename(zipPath))
+
+	def _volumeSize(self, update):
+		"""Bytes per volume of a new archive, or 0 for one file. Updated archives are never split."""
+		if update:
+			return 0
+		return max(0, loadConfig().get("splitVolumeMB", 0)) * MB
+
+	def _storesIncompressible(self, archiveFormat, sevenZip, volumeSize):
+		"""Whether the engine writing a new archive stores already compressed files instead of deflating them.
+
+		Storing some members while deflating others is a zip feature. 7-Zip needs a
+		second run on the archive for it, which it cannot make on split volumes, and
+		as that run rewrites the archive it is only made when asked for.
+		"""
+		if archiveFormat != FORMAT_ZIP:
+			return False
+		conf = loadConfig()
+		if sevenZip:
+			return not volumeSize and conf.get("sevenZipStorePass", False)
+		return conf.get("storeIncompressible", True)
+
+	def _staging(self, zipPath, volumeSize):
+		"""The ArchiveStaging of zipPath, in the staging folder when the settings ask for one."""
+		conf = loadConfig()
+		stagingFolder = None
+		if shouldStage(zipPath, conf.get("stageArchives", STAGE_NEVER)):
+			stagingFolder = conf.get("stagingFolder", "")
+		return ArchiveStaging(zipPath, stagingFolder, volumeSize)
+
+	def _byteProgress(self, job, message, progressStart=0.0, progressShare=1.0):
+		"""An onProgress(bytesDone, totalBytes) showing the bytes in the given share of the job's dialog.
+
+		message is formatted with the percentage of the whole job.
+		"""
+		last_percent = -1
+
+		def on_progress(bytes_done, total_bytes):
+			nonlocal last_percent
+			fraction = bytes_done / total_bytes if total_bytes else 1.0
+			percent = int((progressStart + fraction * progressShare) * 100)
+			if percent != last_percent:
+				last_percent = percent
+				job.updateProgress(percent, message.format(percent=percent))
+		return on_progress
+
+	def _publishArchive(self, job, staging):
+		"""Move a finished archive to its destination. Returns False if cancelled meanwhile."""
+		return staging.publish(self._byteProgress(job, _("Copying to destination: {percent}%")), job.isCancelled)
+
+	def _compressInBackground(self, job, sevenZipPath, selectedItems, callback, update=False, archiveFormat=FORMAT_ZIP, preset=DEFAULT_PRESET, manifest=None):
+		listPaths = []
+		zipPath = staging = None
+		try:
+			zipPath = self._archivePath(selectedItems, update, archiveExtension(archiveFormat))
+			if zipPath is None:
+				callback(False, _("Another job is still writing this archive"))
+				return
+			updating = update and os.path.exists(zipPath)
 			
-			last_percent = 0
-			msg = _("Compressing...")
-			start_time = time.time()
+			volumeSize = self._volumeSize(update)
+			staging = self._staging(zipPath, volumeSize)
+			if updating and not staging.stageExisting(self._byteProgress(job, _("Copying archive: {percent}%")), job.isCancelled):
+				callback(False, _("Compression cancelled"))
+				return
+			rules = self._compressionRules()
+			storeIncompressible = self._storesIncompressible(archiveFormat, True, volumeSize)
+			needsFileList = storeIncompressible or rules.needsFileList() or updating
+			if manifest is None and needsFileList:
+				manifest = CompressionManifest.build(selectedItems, rules, job.isCancelled)
+			if manifest is not None:
+				job.setTotalBytes(manifest.totalSize)
+			passes = self._sevenZipPasses(selectedItems, rules, storeIncompressible, manifest if needsFileList else None, staging.path if updating else None)
+			listPaths = [listPath for _command, _switches, _arguments, _weight, listPath in passes if listPath]
+			workDir = os.path.dirname(selectedItems[0]) if listPaths else None
 			
-			while True:
-				if self.cancelled:
-					process.terminate()
+			profile = profileFromConfig(loadConfig())
+			return_code = 0
+			progress_start = 0.0
+			for command, switches, arguments, weight, _listPath in passes:
+				if job.cancelled or return_code != 0:
 					break
-				if time.time() - start_time > 30:
-					try:
-						process.terminate()
-						log.warning("Compression timeout after 30 seconds")
-						callback(False, _("Compression timed out"))
-						return
-					except:
-						pass
-				try:
-					line = process.stdout.readline()
-					if not line:
-						break
-					if '%' in line:
-						try:
-							percent_str = line.split('%')[0].strip()
-							percent = int(percent_str)
-							if percent > last_percent:
-								last_percent = percent
-								self._updateProgress(percent, f"{msg} {percent}%")
-						except ValueError:
-							pass
-				except Exception as e:
-					log.error(f"Error reading stdout: {e}")
-					break
-			
-			return_code = process.poll()
+				# The store pass's -mx0 has to win over the profile, so it gets no method
+				passProfile = profile._replace(method="") if "-mx0" in switches else profile
+				cmd = [sevenZipPath, command, staging.path] + sevenZipSwitches(archiveFormat, preset, passProfile) + switches + arguments
+				if volumeSize:
+					cmd.append(f"-v{volumeSize // MB}m")
+				return_code, stalled = self._run7zipPass(job, cmd, workDir, progress_start, weight)
+				if stalled:
+					callback(False, _("Compression stopped, 7-Zip made no progress"))
+					return
+				progress_start += weight
 			
-			if self.cancelled:
+			if job.cancelled or return_code != 0:
+				callback(False, _("Compression cancelled") if job.cancelled else _("compression failed"))
+			elif not self._publishArchive(job, staging):
 				callback(False, _("Compression cancelled"))
-			elif return_code == 0:
-				callback(True, _("Compression completed {name}").format(name=os.path.basename(zipPath)))
 			else:
-				callback(False, _("compression failed"))
+				callback(True, self._completedMessage(zipPath, updating, volumeSize))
 		except Exception as e:
 			log.error(f"Error in background compression: {e}")
 			callback(False, _("Error in compression process: {error}").format(error=str(e)))
+		finally:
+			# Whatever did not reach the destination is removed, so no partial archive stays behind
+			if staging:
+				staging.discard()
+			if zipPath:
+				self._releaseArchivePath(zipPath)
+			for listPath in listPaths:
+				try:
+					os.remove(listPath)
+				except OSError:
+					pass
+
+	def _sevenZipPasses(self, selectedItems, rules, storeIncompressible, manifest=None, updatedArchive=None):
+		"""The 7-Zip runs for a compression, as (command, switches, arguments, share of progress, list file).
+
+		7-Zip applies one method to a whole zip, so with storeIncompressible, files
+		whose extension marks them as already compressed are added stored (-mx0) by
+		a second run, after the others are deflated. Only names are looked at, so
+		no file is opened before 7-Zip starts. Both runs get a list file of the
+		files in manifest, which the caller builds when rules, storing or an update
+		need one. Without a manifest and without files to store, the selected items
+		are passed as they are, so empty folders are kept.
+		When updatedArchive is given, the runs use the u command, which copies
+		unchanged members without compressing them again, and a final d run removes
+		the members whose files are gone.
+		"""
+		if manifest is None:
+			return [("a", rules.sevenZipSwitches(), list(selectedItems), 1.0, None)]
+		deflated = []
+		stored = []
+		for entry in manifest:
+			if storeIncompressible and isIncompressibleName(entry.arcname):
+				stored.append((entry.arcname, entry.size))
+			else:
+				deflated.append((entry.arcname, entry.size))
+		command = "u" if updatedArchive else "a"
+		if not stored and not rules.needsFileList() and not updatedArchive:
+			return [(command, rules.sevenZipSwitches(), list(selectedItems), 1.0, None)]
+		total = sum(size for _arcname, size in deflated + stored) or 1
+		passes = []
+		for switches, files in (([], deflated), (["-mx0"], stored)):
+			if files:
+				listPath = self._writeListFile(arcname for arcname, _size in files)
+				weight = sum(size for _arcname, size in files) / total
+				passes.append((command, switches, ["-scsUTF-8", "@" + listPath], weight, listPath))
+		if updatedArchive:
+			kept = {self._memberKey(arcname) for arcname, _size in deflated + stored}
+			removed = [name for name in readArchiveIndex(updatedArchive, reusableOnly=False) if self._memberKey(name) not in kept]
+			if removed:
+				listPath = self._writeListFile(name.replace("/", os.sep) for name in removed)
+				passes.append(("d", [], ["-scsUTF-8", "@" + listPath], 0.0, listPath))
+		return passes
+
+	def _memberKey(self, arcname):
+		return arcname.replace(os.sep, "/").lower()
+
+	def _startProgressReader(self, process):
+		"""Read 7-Zip's output on a separate thread and queue it piece by piece.
+
+		With -bsp1 7-Zip redraws its progress line in place using carriage returns and
+		backspaces, and never ends it with a newline until it is done, so readline()
+		would block for the whole job. As in RobocopyManager._startStdoutReader, a
+		reader thread feeds a queue, and here raw output is split on every one of
+		those control characters.
+		"""
+		outputQueue = queue.Queue()
+
+		def _readerLoop():
+			decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+			pending = ""
+			try:
+				while True:
+					data = process.stdout.read1(READ_BLOCK_SIZE)
+					if not data:
+						break
+					pieces = SEVEN_ZIP_SPLIT_RE.split(pending + decoder.decode(data))
+					pending = pieces.pop()
+					for piece in pieces:
+						if piece.strip():
+							outputQueue.put(piece)
+			except (OSError, ValueError):
+				pass
+			finally:
+				if pending.strip():
+					outputQueue.put(pending)
+				outputQueue.put(None)
+
+		readerThread = Thread(target=_readerLoop, daemon=True)
+		readerThread.start()
+		return outputQueue, readerThread
+
+	def _run7zipPass(self, job, cmd, workDir, progressStart, progressShare, msg=None):
+		"""Run one 7-Zip command, mapping its percentage into the given share of the dialog.
+
+		7-Zip is only stopped when it has written nothing at all for the configured
+		stall window, so a long scan that prints no percentage is not taken for a
+		stall. It runs at the priority of the
+		chosen engine profile. Returns (return code, stalled).
+		"""
+		conf = loadConfig()
+		stallSeconds = conf.get("compressionStallSeconds", DEFAULT_STALL_SECONDS)
+		creationFlags = subprocess.CREATE_NO_WINDOW | priorityClass(profileFromConfig(conf))
+		cmd = cmd + ["-bsp1", "-bso0", "-bse1", "-sccUTF-8"]
+		process = subprocess.Popen(cmd, cwd=workDir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, creationflags=creationFlags)
+		outputQueue, readerThread = self._startProgressReader(process)
+		
+		msg = msg or _("Compressing...")
+		last_percent = -1
+		current_file = ""
+		last_activity = time.monotonic()
+		last_ui_update = 0.0
+		stalled = False
+		
+		while True:
+			if job.cancelled:
+				process.terminate()
+				break
+			try:
+				piece = outputQueue.get(timeout=QUEUE_POLL_TIMEOUT)
+			except queue.Empty:
+				if process.poll() is not None and not readerThread.is_alive():
+					break
+				if time.monotonic() - last_activity > stallSeconds:
+					log.warning(f"7-Zip made no progress for {stallSeconds} seconds, stopping it")
+					process.terminate()
+					stalled = True
+					break
+				continue
+			if piece is None:
+				break
+			last_activity = time.monotonic()
+			match = SEVEN_ZIP_PROGRESS_RE.match(piece)
+			if not match:
+				log.debug(f"7-Zip: {piece.strip()}")
+				continue
+			percent = int((progressStart + int(match.group(1)) / 100 * progressShare) * 100)
+			name = (match.group(2) or "").strip()
+			if percent == last_percent and (not name or name == current_file):
+				continue
+			if name:
+				current_file = name
+			if percent != last_percent or last_activity - last_ui_update >= UI_UPDATE_MIN_INTERVAL:
+				last_percent = percent
+				last_ui_update = last_activity
+				job.updateProgress(percent, f"{msg} {percent}% {os.path.basename(current_file)}")
+		
+		try:
+			process.wait(timeout=10)
+		except subprocess.TimeoutExpired:
+			process.kill()
+			process.wait(timeout=5)
+		readerThread.join(timeout=2)
+		return process.returncode, stalled
+
+	def _compressionRules(self):
+		conf = loadConfig()
+		rules = ExclusionRules.fromConfig(conf)
+		if conf.get("respectGitignore", False):
+			return GitIgnoreRules(rules)
+		return rules
+
+	def _writeListFile(self, arcnames):
+		"""Write a 7-Zip list file of names relative to the folder holding the selection."""
+		fd, listPath = tempfile.mkstemp(prefix="xplorer_", suffix=".txt")
+		with os.fdopen(fd, "w", encoding="utf-8") as f:
+			for arcname in arcnames:
+				f.write(arcname + "\n")
+		return listPath
 
 	def _onCompressionComplete(self, success, message):
 		if success:
 			tones.beep(1000, 300)
 		else:
 			tones.beep(500, 300)
+		if message:
+			wx.CallAfter(ui.message, message.replace("\n", ", "))
 		
 		if hasattr(self.plugin, 'lastExplorerHwnd') and self.plugin.lastExplorerHwnd and winUser.isWindow(self.plugin.lastExplorerHwnd):
 			try:
 				winUser.setForegroundWindow(self.plugin.lastExplorerHwnd)
 			except Exception as e:
 				log.error(f"Error setting foreground window: {e}")
-		
-		def destroy_dialog():
-			if self.progressDialog:
-				try:
-					self.progressDialog.Destroy()
-				except:
-					pass
-				self.progressDialog = None
-		wx.CallAfter(destroy_dialog)
 
-	def compressZip(self):
+	def _startWithProgress(self, title, paths, target, args):
+		"""Queue target(job, *args) as a job on paths; it gets its progress dialog when it starts."""
+		job = CompressionJob(title, jobName(paths), target, args)
+		ahead = self.jobs.submit(job)
+		if ahead:
+			ui.message(_("Queued, {count} jobs ahead").format(count=ahead))
+
+	def updateZip(self):
+		"""Refresh the archive Compress zip created for the selection, adding only new and changed files."""
+		self.compressZip(update=True)
+
+	def compressZip(self, update=False):
 		focus = api.getFocusObject()
 		if not focus or focus.appModule.appName != "explorer":
 			return
@@ -150,51 +425,358 @@ class CompressionManager:
 				
 			paths = [path for name, path in selectedItems]
 			self.plugin.lastExplorerHwnd = api.getForegroundObject().windowHandle
-				
-			sevenZipPath = self._find7zip()
-			style = wx.PD_APP_MODAL | wx.PD_CAN_ABORT | wx.PD_ELAPSED_TIME | wx.PD_REMAINING_TIME | wx.STAY_ON_TOP
 			
-			def show_and_start():
+			engine = self._chooseEngine(update)
+			if not engine:
+				return
+			compress, leadingArgs, archiveFormat, preset = engine
+			args = (paths, self._onCompressionComplete, update, archiveFormat, preset)
+			if not update and loadConfig().get("announceCompressionEstimate", False):
+				self._startWithProgress(_("Compressing files"), paths, self._estimateThenCompress, (compress, leadingArgs) + args)
+			else:
+				self._startWithProgress(_("Compressing files"), paths, compress, leadingArgs + args)
+		except Exception as e:
+			log.error(f"Error in compressZip: {e}")
+			ui.message(_("Error compressing files"))
+
+	def _chooseEngine(self, update=False):
+		"""(compress function, its leading arguments, format, preset) for the configured format, or None after saying why not."""
+		conf = loadConfig()
+		# Update zip always refreshes a zip, whatever format Compress is set to
+		archiveFormat = FORMAT_ZIP if update else conf.get("archiveFormat", FORMAT_ZIP)
+		preset = conf.get("compressionPreset", DEFAULT_PRESET)
+		sevenZipPath = self._find7zip()
+		if archiveFormat in SEVEN_ZIP_ONLY_FORMATS and not sevenZipPath:
+			ui.message(_("The {format} format needs 7-Zip").format(format=archiveFormat))
+			return None
+		# tarfile streams tar.gz and tar.xz directly; 7-Zip would need a tar pass and a compression pass
+		if sevenZipPath and archiveFormat not in TAR_FORMATS:
+			return self._compressInBackground, (sevenZipPath,), archiveFormat, preset
+		return self._compressWithBuiltIn, (), archiveFormat, preset
+
+	def estimateCompression(self):
+		"""Speak how large the archive of the selection will be and how long it will take, after about two seconds."""
+		focus = api.getFocusObject()
+		if not focus or focus.appModule.appName != "explorer":
+			return
+		try:
+			selectedItems, _ignore = self.plugin._getSelectedItems()
+			if not selectedItems:
+				ui.message(_("No items selected"))
+				return
+			paths = [path for name, path in selectedItems]
+			engine = self._chooseEngine()
+			if not engine:
+				return
+			compress, _leadingArgs, archiveFormat, preset = engine
+			ui.message(_("Estimating"))
+
+			def run():
 				try:
-					self.progressDialog = wx.ProgressDialog(
-						_("Compressing files"),
-						_("Starting..."),
-						maximum=100,
-						parent=gui.mainFrame,
-						style=style
-					)
-					self.progressDialog.Raise()
-					wx.CallAfter(self.progressDialog.SetFocus)
-					wx.CallAfter(ui.message, _("Compressing files"))
-					
-					if sevenZipPath:
-						if self.compressThread and self.compressThread.is_alive():
-							self.compressThread.join(timeout=0.5)
-						self.compressThread = Thread(
-							target=self._compressInBackground,
-							args=(sevenZipPath, paths, self._onCompressionComplete)
-						)
-						self.compressThread.daemon = True
-						self.compressThread.start()
-					else:
-						self.compressThread = Thread(
-							target=self._compressWithBuiltIn,
-							args=(paths, self._onCompressionComplete)
-						)
-						self.compressThread.daemon = True
-						self.compressThread.start()
+					estimate = self._estimate(paths, compress, archiveFormat, preset)
+					message = self._estimateMessage(estimate)
 				except Exception as e:
-					log.error(f"Compression start failed: {e}")
-					ui.message(_("Failed to start compression"))
-					if self.progressDialog:
-						self.progressDialog.Destroy()
-						self.progressDialog = None
-			
-			wx.CallAfter(show_and_start)
+					log.error(f"Compression estimate failed: {e}")
+					message = _("Cannot estimate compression")
+				wx.CallAfter(ui.message, message)
+
+			Thread(target=run, daemon=True).start()
 		except Exception as e:
-			log.error(f"Error in compressZip: {e}")
+			log.error(f"Error in estimateCompression: {e}")
+			ui.message(_("Cannot estimate compression"))
+
+	def _estimate(self, paths, compress, archiveFormat, preset, update=False, isCancelled=None):
+		"""The CompressionEstimate for compressing paths with the compress function of _chooseEngine, or None if cancelled."""
+		sevenZip = compress == self._compressInBackground
+		storeIncompressible = self._storesIncompressible(archiveFormat, sevenZip, self._volumeSize(update))
+		return estimateArchive(paths, self._compressionRules(), archiveFormat, preset, storeIncompressible, isCancelled=isCancelled)
+
+	def _estimateMessage(self, estimate):
+		"""The spoken form of a CompressionEstimate."""
+		if estimate.exactTotals:
+			source = _("{size} in {count} files").format(size=format_size(estimate.totalBytes), count=estimate.fileCount)
+		else:
+			source = _("About {size} in {count} files").format(size=format_size(estimate.totalBytes), count=estimate.fileCount)
+		percent = round(estimate.archiveBytes * 100 / estimate.totalBytes) if estimate.totalBytes else 100
+		archive = _("archive about {size}, {percent}%").format(size=format_size(estimate.archiveBytes), percent=percent)
+		if estimate.seconds is None:
+			duration = _("duration unknown")
+		else:
+			duration = _("about {duration}").format(duration=format_duration(max(1, estimate.seconds)))
+		return ", ".join([source, archive, duration])
+
+	def _estimateThenCompress(self, job, compress, leadingArgs, paths, callback, update, archiveFormat, preset):
+		"""Speak the estimate for paths, then compress them as compressZip would have.
+
+		The manifest the estimate listed is handed on, so the selection is walked once.
+		"""
+		job.updateProgress(0, _("Estimating..."))
+		manifest = None
+		try:
+			estimate = self._estimate(paths, compress, archiveFormat, preset, update, job.isCancelled)
+			if estimate:
+				manifest = estimate.manifest
+				wx.CallAfter(ui.message, self._estimateMessage(estimate))
+		except Exception as e:
+			log.error(f"Compression estimate failed: {e}")
+		compress(job, *leadingArgs, paths, callback, update, archiveFormat, preset, manifest)
+
+	def compressEachSeparately(self):
+		"""Make one archive per selected item, several at a time, as a single job."""
+		focus = api.getFocusObject()
+		if not focus or focus.appModule.appName != "explorer":
+			return
+		try:
+			selectedItems, _ignore = self.plugin._getSelectedItems()
+			if not selectedItems:
+				ui.message(_("No items selected"))
+				return
+			paths = [path for name, path in selectedItems]
+			self.plugin.lastExplorerHwnd = api.getForegroundObject().windowHandle
+			engine = self._chooseEngine()
+			if not engine:
+				return
+			self._startWithProgress(_("Compressing each item separately"), paths, self._compressBatchInBackground, (engine, paths, self._onCompressionComplete))
+		except Exception as e:
+			log.error(f"Error in compressEachSeparately: {e}")
 			ui.message(_("Error compressing files"))
 
+	def _compressBatchInBackground(self, job, engine, paths, callback):
+		"""Compress every item of paths into its own archive, a bounded number at once.
+
+		Each archive is made by the usual compress function through a BatchItemJob,
+		so a failed archive is recorded and the others carry on.
+		"""
+		compress, leadingArgs, archiveFormat, preset = engine
+		parallel = max(1, min(len(paths), loadConfig().get("batchParallelArchives", DEFAULT_BATCH_PARALLEL)))
+		# Share the cores between the archives made at once
+		engineWorkers = max(1, (os.cpu_count() or 1) // parallel)
+		batch = BatchProgress(job, len(paths))
+		failures = []
+
+		def compressItem(item):
+			if job.cancelled:
+				return
+			outcome = []
+			itemJob = None
+			try:
+				itemJob = batch.itemJob(engineWorkers)
+				compress(itemJob, *leadingArgs, [item], lambda success, message: outcome.append((success, message)), False, archiveFormat, preset)
+			except Exception as e:
+				outcome.append((False, str(e)))
+			finally:
+				if itemJob:
+					itemJob.finish()
+			if outcome and not outcome[0][0] and not job.cancelled:
+				log.warning(f"Batch compression of {item} failed: {outcome[0][1]}")
+				failures.append(os.path.basename(item))
+
+		try:
+			batch.report()
+			with ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="xPlorerBatch") as executor:
+				for future in [executor.submit(compressItem, item) for item in paths]:
+					future.result()
+			if job.cancelled:
+				callback(False, _("Compression cancelled"))
+				return
+			summary = _("{done} of {count} archives created").format(done=len(paths) - len(failures), count=len(paths))
+			if failures:
+				summary += ", " + _("failed: {names}").format(names=", ".join(failures))
+			callback(not failures, summary)
+		except Exception as e:
+			log.error(f"Batch compression failed: {e}")
+			callback(False, _("Error in compression process: {error}").format(error=str(e)))
+
+	def extractHere(self):
+		self._extract(toFolder=False)
+
+	def extractToFolder(self):
+		self._extract(toFolder=True)
+
+	def _extract(self, toFolder):
+		focus = api.getFocusObject()
+		if not focus or focus.appModule.appName != "explorer":
+			return
+		try:
+			selectedItems, _ignore = self.plugin._getSelectedItems()
+			if not selectedItems:
+				ui.message(_("No items selected"))
+				return
+			sevenZipPath = self._find7zip()
+			archives = [path for name, path in selectedItems if os.path.isfile(path) and self._canExtract(path, sevenZipPath)]
+			if not archives:
+				if sevenZipPath:
+					ui.message(_("No archives selected"))
+				else:
+					ui.message(_("No zip or tar archives selected. Install 7-Zip to extract other formats"))
+				return
+			self.plugin.lastExplorerHwnd = api.getForegroundObject().windowHandle
+			self._startWithProgress(_("Extracting files"), archives, self._extractInBackground, (sevenZipPath, archives, toFolder, self._onCompressionComplete))
+		except Exception as e:
+			log.error(f"Error in extract: {e}")
+			ui.message(_("Error extracting files"))
+
+	def _canExtract(self, path, sevenZipPath):
+		if isTarArchive(path):
+			return True
+		if sevenZipPath:
+			return path.lower().endswith(SEVEN_ZIP_ARCHIVE_EXTENSIONS)
+		return zipfile.is_zipfile(path)
+
+	def _extractionFolder(self, archivePath, toFolder):
+		folder = os.path.dirname(archivePath)
+		if not toFolder:
+			return folder
+		name = stripArchiveExtension(os.path.basename(archivePath), SEVEN_ZIP_ARCHIVE_EXTENSIONS + TAR_ARCHIVE_EXTENSIONS)
+		return freePath(os.path.join(folder, name or _("Extracted")))
+
+	def _extractInBackground(self, job, sevenZipPath, archives, toFolder, callback):
+		msg = _("Extracting...")
+		try:
+			share = 1.0 / len(archives)
+			for index, archivePath in enumerate(archives):
+				if job.cancelled:
+					break
+				destination = self._extractionFolder(archivePath, toFolder)
+				if isTarArchive(archivePath):
+					on_progress = self._byteProgress(job, _("Extracting... {percent}%"), index * share, share)
+					TarExtractor(archivePath, destination, isCancelled=job.isCancelled, onProgress=on_progress).run()
+				elif sevenZipPath:
+					# -aou renames extracted files instead of overwriting existing ones
+					cmd = [sevenZipPath, "x", archivePath, "-o" + destination, "-aou", "-y"]
+					return_code, stalled = self._run7zipPass(job, cmd, None, index * share, share, msg)
+					if stalled:
+						callback(False, _("Extraction stopped, 7-Zip made no progress"))
+						return
+					if return_code != 0 and not job.cancelled:
+						callback(False, _("Extraction failed {name}").format(name=os.path.basename(archivePath)))
+						return
+				else:
+					on_progress = self._byteProgress(job, _("Extracting... {percent}%"), index * share, share)
+					ParallelUnzipEngine(archivePath, destination, isCancelled=job.isCancelled, onProgress=on_progress).run()
+			if job.cancelled:
+				callback(False, _("Extraction cancelled"))
+			else:
+				job.updateProgress(100, _("Completed"))
+				callback(True, _("Extraction completed"))
+		except Exception as e:
+			log.error(f"Extraction failed: {e}")
+			callback(False, _("Extraction failed: {error}").format(error=str(e)))
+
+	def _selectedZipArchives(self):
+		"""The selected zip archives, or None after saying why there are none."""
+		focus = api.getFocusObject()
+		if not focus or focus.appModule.appName != "explorer":
+			return None
+		selectedItems, _ignore = self.plugin._getSelectedItems()
+		if not selectedItems:
+			ui.message(_("No items selected"))
+			return None
+		archives = [path for name, path in selectedItems if os.path.isfile(path) and zipfile.is_zipfile(path)]
+		if not archives:
+			ui.message(_("No zip archives selected"))
+			return None
+		return archives
+
+	def _memberName(self, archives, archivePath, name):
+		"""name, after the archive's name when members of several archives share one list."""
+		if len(archives) == 1:
+			return name
+		return f"{os.path.basename(archivePath)}: {name}"
+
+	def testArchive(self):
+		"""Check the CRC of every member of the selected zip archives, then show the results."""
+		try:
+			archives = self._selectedZipArchives()
+			if not archives:
+				return
+			self.plugin.lastExplorerHwnd = api.getForegroundObject().windowHandle
+			self._startWithProgress(_("Testing archive"), archives, self._testInBackground, (archives, self._onCompressionComplete))
+		except Exception as e:
+			log.error(f"Error in testArchive: {e}")
+			ui.message(_("Error testing archive"))
+
+	def _testInBackground(self, job, archives, callback):
+		try:
+			share = 1.0 / len(archives)
+			results = []
+			for index, archivePath in enumerate(archives):
+				on_progress = self._byteProgress(job, _("Testing... {percent}%"), index * share, share)
+				archiveResults = ParallelZipTester(archivePath, isCancelled=job.isCancelled, onProgress=on_progress).run()
+				if archiveResults is None:
+					callback(False, _("Test cancelled"))
+					return
+				results.extend(
+					result._replace(name=self._memberName(archives, archivePath, result.name))
+					for result in archiveResults
+				)
+			# Damaged members first, so they are at the top of the list
+			results.sort(key=lambda result: result.error is None)
+			damaged = sum(1 for result in results if result.error is not None)
+			summary = "\n".join([
+				_("{count} files, {size}").format(count=len(results), size=format_size(sum(result.fileSize for result in results))),
+				_("{count} damaged").format(count=damaged) if damaged else _("All files are intact"),
+			])
+			job.updateProgress(100, _("Completed"))
+			callback(damaged == 0, summary)
+
+			def cellText(result, column):
+				if column == 0:
+					return result.name
+				if column == 1:
+					return format_size(result.fileSize)
+				return result.error or _("OK")
+
+			title = _("Test of {name}").format(name=os.path.basename(archives[0])) if len(archives) == 1 else _("Test of {count} archives").format(count=len(archives))
+			wx.CallAfter(showArchiveReport, title, summary, [_("Name"), _("Size"), _("Result")], results, cellText)
+		except Exception as e:
+			log.error(f"Archive test failed: {e}")
+			callback(False, _("Archive test failed: {error}").format(error=str(e)))
+
+	def listArchive(self):
+		"""Show the members of the selected zip archives, read from their central directories only."""
+		try:
+			archives = self._selectedZipArchives()
+			if not archives:
+				return
+			Thread(target=self._listInBackground, args=(archives,), daemon=True).start()
+		except Exception as e:
+			log.error(f"Error in listArchive: {e}")
+			ui.message(_("Error listing archive"))
+
+	def _listInBackground(self, archives):
+		try:
+			entries = []
+			for archivePath in archives:
+				archiveEntries = readCentralDirectory(archivePath)
+				if len(archives) == 1:
+					entries = archiveEntries
+				else:
+					entries.extend(entry._replace(name=self._memberName(archives, archivePath, entry.name)) for entry in archiveEntries)
+			files = [entry for entry in entries if not isDirectoryEntry(entry)]
+			totalSize = sum(entry.fileSize for entry in files)
+			compressedSize = sum(entry.compressedSize for entry in files)
+			summary = "\n".join([
+				_("{files} files and {folders} folders").format(files=len(files), folders=len(entries) - len(files)),
+				_("Size: {size}").format(size=format_size(totalSize)),
+				_("Compressed: {size}, {percent}% of the size").format(size=format_size(compressedSize), percent=round(compressedSize * 100 / totalSize) if totalSize else 100),
+			])
+
+			def cellText(entry, column):
+				if column == 0:
+					return entry.name
+				if column == 1:
+					return format_size(entry.fileSize)
+				if column == 2:
+					return format_size(entry.compressedSize)
+				return "{0:04d}-{1:02d}-{2:02d} {3:02d}:{4:02d}".format(*entryTime(entry))
+
+			title = _("Contents of {name}").format(name=os.path.basename(archives[0])) if len(archives) == 1 else _("Contents of {count} archives").format(count=len(archives))
+			wx.CallAfter(showArchiveReport, title, summary, [_("Name"), _("Size"), _("Compressed"), _("Modified")], entries, cellText)
+		except Exception as e:
+			log.error(f"Archive listing failed: {e}")
+			wx.CallAfter(ui.message, _("Cannot list archive: {error}").format(error=str(e)))
+
 	def _find7zip(self):
 		paths = [
 			os.path.join(os.environ.get("ProgramFiles", "C:\\Program Files"), "7-Zip", "7z.exe"),
@@ -206,83 +788,73 @@ class CompressionManager:
 				return path
 		return None
 
-	def _getTotalSize(self, selectedItems):
-		total = 0
-		for path in selectedItems:
-			if os.path.isfile(path):
-				try:
-					total += os.path.getsize(path)
-				except:
-					pass
-			elif os.path.isdir(path):
-				for root, _, files in os.walk(path):
-					for f in files:
-						fp = os.path.join(root, f)
-						try:
-							total += os.path.getsize(fp)
-						except:
-							pass
-		return total
-
-	def _compressWithBuiltIn(self, selectedItems, callback):
-		import zipfile
-		self.cancelled = False
+	def _compressWithBuiltIn(self, job, selectedItems, callback, update=False, archiveFormat=FORMAT_ZIP, preset=DEFAULT_PRESET, manifest=None):
+		zipPath = staging = None
+		volumeSize = self._volumeSize(update)
 		try:
-			if len(selectedItems) == 1:
-				sourcePath = selectedItems[0]
-				if os.path.isfile(sourcePath):
-					baseName = os.path.splitext(os.path.basename(sourcePath))[0]
-				else:
-					baseName = os.path.basename(sourcePath)
-				zipPath = os.path.join(os.path.dirname(sourcePath), baseName + ".zip")
-			else:
-				folderPath = os.path.dirname(selectedItems[0])
-				folderName = os.path.basename(folderPath)
-				zipPath = os.path.join(folderPath, folderName + ".zip")
-		
-			counter = 1
-			originalZipPath = zipPath
-			while os.path.exists(zipPath):
-				name, ext = os.path.splitext(originalZipPath)
-				zipPath = f"{name} ({counter}){ext}"
-				counter += 1
+			zipPath = self._archivePath(selectedItems, update, archiveExtension(archiveFormat))
+			if zipPath is None:
+				callback(False, _("Another job is still writing this archive"))
+				return
+			updating = update and os.path.exists(zipPath)
+			# An update reads the old archive where it is and writes the new one apart from it
+			staging = self._staging(zipPath, volumeSize)
+			target_path = staging.path
 			
-			total_size = self._getTotalSize(selectedItems)
-			current_size = 0
+			# One walk gives both the total for progress and the files to write
+			if manifest is None:
+				manifest = CompressionManifest.build(selectedItems, self._compressionRules(), job.isCancelled)
+			total_size = manifest.totalSize
+			job.setTotalBytes(total_size)
 			
-			with zipfile.ZipFile(zipPath, 'w', zipfile.ZIP_DEFLATED) as zipf:
-				for item in selectedItems:
-					if self.cancelled:
-						break
-					arcname = os.path.basename(item)
-					if os.path.isfile(item):
-						size = os.path.getsize(item)
-						zipf.write(item, arcname)
-						current_size += size
-						percent = int(current_size * 100 / total_size) if total_size > 0 else 0
-						self._updateProgress(percent, _("Compressing: {percent}%").format(percent=percent))
-					elif os.path.isdir(item):
-						for root, _, files in os.walk(item):
-							if self.cancelled:
-								break
-							for file in files:
-								if self.cancelled:
-									break
-								file_path = os.path.join(root, file)
-								relative_path = os.path.relpath(file_path, os.path.dirname(item))
-								size = os.path.getsize(file_path)
-								zipf.write(file_path, os.path.join(arcname, relative_path))
-								current_size += size
-								percent = int(current_size * 100 / total_size) if total_size > 0 else 0
-								self._updateProgress(percent, _("Compressing: {percent}%").format(percent=percent))
+			last_percent = -1
+
+			def on_progress(bytes_done):
+				nonlocal last_percent
+				percent = int(bytes_done * 100 / total_size) if total_size > 0 else 0
+				if percent != last_percent:
+					last_percent = percent
+					job.updateProgress(percent, _("Compressing: {percent}%").format(percent=percent))
+
+			reusable = {}
+			if updating:
+				reusable = {self._memberKey(name): info for name, info in readArchiveIndex(zipPath).items()}
+
+			def reused(arcname, size, mtime):
+				info = reusable.get(self._memberKey(arcname))
+				return info if info is not None and isUnchanged(info, size, mtime) else None
+
+			members = (
+				ZipMember(entry.path, entry.arcname, entry.size, reused(entry.arcname, entry.size, entry.mtime))
+				for entry in manifest
+			)
+			levels = presetLevels(preset)
+			if archiveFormat in TAR_FORMATS:
+				level = levels.xzPreset if archiveFormat == FORMAT_TAR_XZ else levels.zlibLevel
+				engine = TarEngine(target_path, archiveFormat, level, isCancelled=job.isCancelled, onProgress=on_progress, volumeSize=volumeSize)
+			else:
+				engine = ParallelZipEngine(
+					target_path,
+					level=levels.zlibLevel,
+					maxWorkers=job.engineWorkers,
+					isCancelled=job.isCancelled,
+					onProgress=on_progress,
+					storeIncompressible=self._storesIncompressible(archiveFormat, False, volumeSize),
+					reuseArchive=zipPath if updating else None,
+					volumeSize=volumeSize
+				)
+			engine.run(members)
 			
-			if self.cancelled:
-				if os.path.exists(zipPath):
-					os.remove(zipPath)
+			if job.cancelled or not self._publishArchive(job, staging):
 				callback(False, _("Compression cancelled"))
 			else:
-				self._updateProgress(100, _("Completed"))
-				callback(True, _("Compression completed {name}").format(name=os.path.basename(zipPath)))
+				job.updateProgress(100, _("Completed"))
+				callback(True, self._completedMessage(zipPath, updating, volumeSize))
 		except Exception as e:
 			log.error(f"Built-in compression failed: {e}")
-			callback(False, _("Built-in compression failed: {error}").format(error=str(e)))
\ No newline at end of file
+			callback(False, _("Built-in compression failed: {error}").format(error=str(e)))
+		finally:
+			if staging:
+				staging.discard()
+			if zipPath:
+				self._releaseArchivePath(zipPath)
\ No newline at end of file
@@ -0,0 +1,98 @@
+# compressionManifest.py
+
+import os
+from array import array
+from collections import namedtuple
+from .treeWalker import walkTree, ruleScanner
+
+# path: file to read; arcname: name inside the archive, relative to the folder holding the selection
+ManifestEntry = namedtuple("ManifestEntry", ("path", "arcname", "size", "mtime", "mode"))
+
+
+class CompressionManifest:
+	"""Every file a compression will write, gathered in a single walk.
+
+	The stat data the walker already cached is kept in typed arrays, one slot per
+	file, and names are split into a shared folder and a base name, so a manifest
+	of a million files stays small. Totals for progress, the write loop, size
+	reporting and the unchanged-file check of Update zip all read from it, so no
+	file is looked up twice.
+	"""
+
+	def __init__(self):
+		# Folder of each group of files, as an absolute path and as a prefix inside the archive
+		self._folderPaths = []
+		self._folderArcnames = []
+		self._folders = array("L")
+		self._names = []
+		self._sizes = array("Q")
+		self._mtimes = array("d")
+		self._modes = array("L")
+		self.totalSize = 0
+
+	@classmethod
+	def build(cls, selectedItems, rules, isCancelled=None):
+		"""The manifest of selectedItems and every file kept below them by rules.
+
+		Returns a partial manifest when isCancelled() turns True, so callers should check it.
+		"""
+		manifest = cls()
+		for item in selectedItems:
+			if isCancelled and isCancelled():
+				break
+			parent = os.path.dirname(item)
+			if os.path.isfile(item):
+				st = os.stat(item)
+				manifest._add(parent, "", os.path.basename(item), st)
+				continue
+			for scan in walkTree(item, scanner=ruleScanner(rules), isCancelled=isCancelled):
+				folderIndex = None
+				for entry in scan.files:
+					try:
+						st = entry.stat()
+					except OSError:
+						continue
+					if folderIndex is None:
+						folderIndex = manifest._addFolder(scan.path, os.path.relpath(scan.path, parent))
+					manifest._append(folderIndex, entry.name, st)
+		return manifest
+
+	def _addFolder(self, path, arcPrefix):
+		self._folderPaths.append(path)
+		self._folderArcnames.append(arcPrefix)
+		return len(self._folderPaths) - 1
+
+	def _add(self, folderPath, arcPrefix, name, st):
+		self._append(self._addFolder(folderPath, arcPrefix), name, st)
+
+	def _append(self, folderIndex, name, st):
+		self._folders.append(folderIndex)
+		self._names.append(name)
+		self._sizes.append(st.st_size)
+		self._mtimes.append(st.st_mtime)
+		self._modes.append(st.st_mode)
+		self.totalSize += st.st_size
+
+	@property
+	def sizes(self):
+		"""Size of every file, by index, without building an entry for each."""
+		return self._sizes
+
+	def __len__(self):
+		return len(self._names)
+
+	def __getitem__(self, index):
+		folder = self._folders[index]
+		name = self._names[index]
+		arcPrefix = self._folderArcnames[folder]
+		return ManifestEntry(
+			os.path.join(self._folderPaths[folder], name),
+			os.path.join(arcPrefix, name) if arcPrefix else name,
+			self._sizes[index],
+			self._mtimes[index],
+			self._modes[index],
+		)
+
+	def __iter__(self):
+		for index in range(len(self._names)):
+			yield self[index]
@@ -0,0 +1,46 @@
+# compressionPolicy.py
+
+import os
+import zlib
+import zipfile
+
+# Formats that are already compressed; deflating them costs CPU time and saves next to nothing
+INCOMPRESSIBLE_EXTENSIONS = frozenset((
+	".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic", ".heif", ".avif", ".jxl",
+	".mp3", ".m4a", ".aac", ".ogg", ".opus", ".flac", ".wma",
+	".mp4", ".m4v", ".mkv", ".webm", ".avi", ".mov", ".wmv", ".flv", ".3gp",
+	".zip", ".7z", ".rar", ".gz", ".tgz", ".bz2", ".xz", ".txz", ".zst", ".lz4", ".lzma", ".br", ".cab",
+	".msi", ".msix", ".appx", ".jar", ".apk", ".nupkg", ".whl", ".vsix", ".crx", ".xpi", ".nvda-addon",
+	".docx", ".xlsx", ".pptx", ".odt", ".ods", ".odp", ".epub",
+	".woff", ".woff2",
+))
+# Bytes from the start of a file that are trial-compressed when its extension says nothing
+PROBE_SIZE = 16 * 1024
+# Files smaller than this are always deflated; probing them would cost more than it saves
+PROBE_MIN_SIZE = 64 * 1024
+# The probe must shrink to less than this fraction of its size for the file to be deflated
+MAX_DEFLATE_RATIO = 0.95
+
+
+def isIncompressibleName(name):
+	return os.path.splitext(name)[1].lower() in INCOMPRESSIBLE_EXTENSIONS
+
+
+def isCompressibleData(head):
+	"""Trial-compress the first PROBE_SIZE bytes at the fastest level."""
+	probe = head[:PROBE_SIZE]
+	if not probe:
+		return True
+	return len(zlib.compress(probe, 1)) < len(probe) * MAX_DEFLATE_RATIO
+
+
+def chooseMethod(name, fileSize, head):
+	"""ZIP_STORED for members that will not shrink, ZIP_DEFLATED otherwise.
+
+	head is the start of the file, at least PROBE_SIZE bytes unless the file is shorter.
+	"""
+	if isIncompressibleName(name):
+		return zipfile.ZIP_STORED
+	if fileSize >= PROBE_MIN_SIZE and not isCompressibleData(head):
+		return zipfile.ZIP_STORED
+	return zipfile.ZIP_DEFLATED
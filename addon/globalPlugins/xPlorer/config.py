@@ -13,6 +13,51 @@ DEFAULT_CONFIG = {
 	"suppressDirectUIAnnounce": True,
 	"sayFileExplorer": True,
 	"autoPasteClipboardToRename": True,
+	# "logical" adds up file sizes; "onDisk" counts hardlinks once and also reports allocated size
+	"sizeAccounting": "logical",
+	# Seconds Folder info waits before speaking an estimate; 0 always waits for the exact count
+	"folderInfoTimeBudget": 5,
+	"prewarmFolderSizes": False,
+	# Name patterns separated by ";"; a trailing slash matches folders only
+	"exclusionPatterns": "",
+	"excludeHidden": False,
+	"excludeSystem": False,
+	# 0 keeps files of every size
+	"excludeFilesLargerThanMB": 0,
+	# Compress and Robo System copies of folders skip what .gitignore files ignore
+	"respectGitignore": False,
+	# Photos, videos, archives and other files that would not shrink are stored instead of deflated
+	"storeIncompressible": True,
+	# With 7-Zip, files with those extensions are added stored by a second run, which walks
+	# the selection first and rewrites the archive; off passes the selection straight to 7-Zip
+	"sevenZipStorePass": False,
+	# 7-Zip is stopped only after this many seconds without any progress
+	"compressionStallSeconds": 120,
+	# Archive written by Compress: "zip", "7z" (needs 7-Zip), "tar.gz" or "tar.xz"
+	"archiveFormat": "zip",
+	# "fastest", "balanced" or "smallest"
+	"compressionPreset": "balanced",
+	# New archives are split into volumes (name.zip.001, ...) of this many MB; 0 writes one file
+	"splitVolumeMB": 0,
+	# Archives are built in a local folder and copied to their destination when complete:
+	# "never", "network" (destinations on network shares and mapped drives) or "always"
+	"stageArchives": "never",
+	# Local folder archives are built in; empty uses the system temporary folder
+	"stagingFolder": "",
+	# 7-Zip engine profile: "standard", "background" (below normal priority) or "custom"
+	"sevenZipProfile": "standard",
+	# Custom profile: threads (0 uses every core), level (-1 keeps the compression level),
+	# method ("" keeps 7-Zip's default) and priority ("idle", "belowNormal" or "normal")
+	"customProfileThreads": 0,
+	"customProfileLevel": -1,
+	"customProfileMethod": "",
+	"customProfilePriority": "normal",
+	# Compressions and extractions that run at once; the others wait their turn
+	"maxCompressionJobs": 2,
+	# Compress speaks the expected archive size and duration before it starts
+	"announceCompressionEstimate": False,
+	# Archives made at the same time by Compress each item separately
+	"batchParallelArchives": 2,
 }
 
 def loadConfig():
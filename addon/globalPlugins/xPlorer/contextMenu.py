@@ -25,12 +25,22 @@ class ContextMenuManager:
 		menu.AppendSeparator()
 
 		compress_item = menu.Append(wx.ID_ANY, _("Compress zip"))
+		compress_each_item = menu.Append(wx.ID_ANY, _("Compress each item separately"))
+		estimate_item = menu.Append(wx.ID_ANY, _("Estimate compression"))
+		update_zip_item = menu.Append(wx.ID_ANY, _("Update zip"))
+		extract_here_item = menu.Append(wx.ID_ANY, _("Extract here"))
+		extract_to_folder_item = menu.Append(wx.ID_ANY, _("Extract to folder"))
+		test_archive_item = menu.Append(wx.ID_ANY, _("Test archive"))
+		list_archive_item = menu.Append(wx.ID_ANY, _("List archive"))
+		jobs_status_item = menu.Append(wx.ID_ANY, _("Compression jobs status"))
+		cancel_waiting_item = menu.Append(wx.ID_ANY, _("Cancel waiting compression jobs"))
 		invert_selection_item = menu.Append(wx.ID_ANY, _("Invert selection"))
 		copy_address_item = menu.Append(wx.ID_ANY, _("Copy address bar"))
 		copy_content_item = menu.Append(wx.ID_ANY, _("Copy content"))
 		copy_names_item = menu.Append(wx.ID_ANY, _("Copy selected file and folder names"))
 		rename_item = menu.Append(wx.ID_ANY, _("Rename selected file"))
 		say_size_item = menu.Append(wx.ID_ANY, _("Say size"))
+		size_breakdown_item = menu.Append(wx.ID_ANY, _("Size breakdown..."))
 
 		robocopy_menu = wx.Menu()
 		robocopy_item = menu.AppendSubMenu(robocopy_menu, _("Robocopy"))
@@ -50,6 +60,7 @@ class ContextMenuManager:
 
 		settings_item = menu.Append(wx.ID_ANY, _("xPlorer Settings"))
 		folder_info_item = menu.Append(wx.ID_ANY, _("Folder info"))
+		folder_details_item = menu.Append(wx.ID_ANY, _("Folder details..."))
 
 		robocopy_menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(0, self.plugin._executeWithSilence, self.plugin.robocopy.copy), copy_item)
 		robocopy_menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(0, self.plugin._executeWithSilence, self.plugin.robocopy.move), move_item)
@@ -62,16 +73,27 @@ class ContextMenuManager:
 
 		menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(0, self.plugin._executeWithSilence, self.plugin.createFileManager.create_file), create_file_item)
 		menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(0, self.plugin._executeWithSilence, self.plugin.compression.compressZip), compress_item)
+		menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(0, self.plugin._executeWithSilence, self.plugin.compression.compressEachSeparately), compress_each_item)
+		menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(0, self.plugin._executeWithSilence, self.plugin.compression.estimateCompression), estimate_item)
+		menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(0, self.plugin._executeWithSilence, self.plugin.compression.updateZip), update_zip_item)
+		menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(0, self.plugin._executeWithSilence, self.plugin.compression.extractHere), extract_here_item)
+		menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(0, self.plugin._executeWithSilence, self.plugin.compression.extractToFolder), extract_to_folder_item)
+		menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(0, self.plugin._executeWithSilence, self.plugin.compression.testArchive), test_archive_item)
+		menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(0, self.plugin._executeWithSilence, self.plugin.compression.listArchive), list_archive_item)
+		menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(0, self.plugin._executeWithSilence, self.plugin.compression.sayJobsStatus), jobs_status_item)
+		menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(0, self.plugin._executeWithSilence, self.plugin.compression.cancelWaitingJobs), cancel_waiting_item)
 		menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(0, self.plugin._executeWithSilence, self.plugin.selection.invertSelection), invert_selection_item)
 		menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(0, self.plugin._executeWithSilence, self.plugin._copyAddressBar), copy_address_item)
 		menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(0, self.plugin._executeWithSilence, self.plugin.clipboard.copyFileContent), copy_content_item)
 		menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(0, self.plugin._executeWithSilence, self.plugin.clipboard.copySelectedNames), copy_names_item)
 		menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(0, self.plugin._executeWithSilence, self.plugin.fileOps.renameFile), rename_item)
 		menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(0, self.plugin._executeWithSilence, self.plugin.fileOps.saySize), say_size_item)
+		menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(0, self.plugin._executeWithSilence, self.plugin.fileOps.showSizeBreakdown), size_breakdown_item)
 		menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(800, self.plugin._executeWithSilence, self.plugin.txt2folder.convert_txt_to_folder), txt_to_folder_item)
 		menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(0, self.plugin._executeWithSilence, self.plugin._createMultipleFolders), create_multiple_folders_item)
 		menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(0, self.plugin._executeWithSilence, self.plugin._openSettings), settings_item)
 		menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(0, self.plugin._executeWithSilence, self.plugin.folderInfo.get_folder_info), folder_info_item)
+		menu.Bind(wx.EVT_MENU, lambda evt: core.callLater(0, self.plugin._executeWithSilence, self.plugin.folderInfo.get_folder_details), folder_details_item)
 
 		return menu
 
@@ -0,0 +1,147 @@
+# diskUsage.py
+
+import os
+import time
+import ctypes
+import functools
+from ctypes import wintypes
+from collections import namedtuple
+from logHandler import log
+from .treeWalker import scanDirectory, walkTree
+
+FILE_ATTRIBUTE_SPARSE_FILE = 0x200
+FILE_ATTRIBUTE_COMPRESSED = 0x800
+INVALID_FILE_SIZE = 0xFFFFFFFF
+DEFAULT_CLUSTER_SIZE = 4096
+PROGRESS_INTERVAL = 0.5
+
+# files: (identity or None, logical size, allocated size) for every regular file
+UsageScan = namedtuple("UsageScan", ("path", "depth", "files", "subdirs"))
+
+_clusterSizes = {}
+_getCompressedFileSize = None
+
+
+def _clusterSize(path):
+	root = os.path.splitdrive(os.path.abspath(path))[0] + "\\"
+	size = _clusterSizes.get(root)
+	if size is None:
+		size = DEFAULT_CLUSTER_SIZE
+		try:
+			sectorsPerCluster = wintypes.DWORD(0)
+			bytesPerSector = wintypes.DWORD(0)
+			freeClusters = wintypes.DWORD(0)
+			totalClusters = wintypes.DWORD(0)
+			if ctypes.windll.kernel32.GetDiskFreeSpaceW(
+				root,
+				ctypes.byref(sectorsPerCluster),
+				ctypes.byref(bytesPerSector),
+				ctypes.byref(freeClusters),
+				ctypes.byref(totalClusters)
+			):
+				size = sectorsPerCluster.value * bytesPerSector.value or DEFAULT_CLUSTER_SIZE
+		except (OSError, AttributeError, ValueError) as e:
+			log.debug(f"Cannot read cluster size of {root}: {e}")
+		_clusterSizes[root] = size
+	return size
+
+
+def _compressedFileSize(path):
+	"""Bytes actually stored for an NTFS compressed or sparse file, or None."""
+	global _getCompressedFileSize
+	if _getCompressedFileSize is None:
+		kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+		_getCompressedFileSize = kernel32.GetCompressedFileSizeW
+		_getCompressedFileSize.argtypes = (wintypes.LPCWSTR, ctypes.POINTER(wintypes.DWORD))
+		_getCompressedFileSize.restype = wintypes.DWORD
+	high = wintypes.DWORD(0)
+	low = _getCompressedFileSize(path, ctypes.byref(high))
+	if low == INVALID_FILE_SIZE and ctypes.get_last_error():
+		return None
+	return (high.value << 32) | low
+
+
+def _allocatedSize(path, st, clusterSize):
+	if hasattr(st, "st_blocks"):
+		return st.st_blocks * 512
+	size = st.st_size
+	if getattr(st, "st_file_attributes", 0) & (FILE_ATTRIBUTE_SPARSE_FILE | FILE_ATTRIBUTE_COMPRESSED):
+		try:
+			stored = _compressedFileSize(path)
+			if stored is not None:
+				size = stored
+		except (OSError, AttributeError) as e:
+			log.debug(f"Cannot read compressed size of {path}: {e}")
+	return (size + clusterSize - 1) // clusterSize * clusterSize
+
+
+def _scanUsage(path, depth, rules=None):
+	"""walkTree scanner that adds file identity and allocated size on the worker thread."""
+	scan = scanDirectory(path, depth, rules)
+	clusterSize = _clusterSize(path) if os.name == "nt" else 0
+	files = []
+	for entry in scan.files:
+		try:
+			st = entry.stat()
+			# On Windows the directory listing carries no inode or link count; a full stat does
+			if not st.st_ino:
+				st = os.stat(entry.path)
+		except OSError:
+			continue
+		# Only files with several links can be seen twice, so only those are remembered
+		identity = (st.st_dev << 128) | st.st_ino if st.st_nlink > 1 else None
+		files.append((identity, st.st_size, _allocatedSize(entry.path, st, clusterSize)))
+	return UsageScan(path, depth, files, scan.subdirs)
+
+
+class DiskUsage:
+	"""Logical and allocated size of several items, counting each hardlinked file once.
+
+	File identities are kept as single packed integers of (st_dev, st_ino), and only
+	for files that have more than one link, so memory stays bounded on trees with
+	millions of ordinary files.
+	"""
+
+	def __init__(self, rules=None):
+		self.rules = rules
+		self.logicalBytes = 0
+		self.allocatedBytes = 0
+		self.fileCount = 0
+		self.folderCount = 0
+		self.duplicateLinks = 0
+		self._seen = set()
+
+	def _add(self, identity, logicalSize, allocatedSize):
+		if identity is not None:
+			if identity in self._seen:
+				self.duplicateLinks += 1
+				return
+			self._seen.add(identity)
+		self.logicalBytes += logicalSize
+		self.allocatedBytes += allocatedSize
+		self.fileCount += 1
+
+	def addFile(self, path):
+		st = os.stat(path)
+		clusterSize = _clusterSize(path) if os.name == "nt" else 0
+		identity = (st.st_dev << 128) | st.st_ino if st.st_nlink > 1 else None
+		self._add(identity, st.st_size, _allocatedSize(path, st, clusterSize))
+
+	def addFolder(self, folderPath, isCancelled=None, onProgress=None, progressInterval=PROGRESS_INTERVAL):
+		"""Walk folderPath into the totals. Returns False if the walk was cancelled.
+
+		onProgress() is called without arguments at most once per progressInterval
+		seconds; the running totals are the attributes of this object.
+		"""
+		lastProgressTime = time.monotonic()
+		scanner = functools.partial(_scanUsage, rules=self.rules)
+		for scan in walkTree(folderPath, scanner=scanner, isCancelled=isCancelled):
+			for identity, logicalSize, allocatedSize in scan.files:
+				self._add(identity, logicalSize, allocatedSize)
+			self.folderCount += len(scan.subdirs)
+			if onProgress:
+				now = time.monotonic()
+				if now - lastProgressTime >= progressInterval:
+					lastProgressTime = now
+					onProgress()
+		return not (isCancelled and isCancelled())
@@ -0,0 +1,45 @@
+# engineProfiles.py
+
+import subprocess
+from collections import namedtuple
+
+# threads: 0 uses every core; level: None keeps the compression level setting;
+# method: "" keeps 7-Zip's default for the format; priority: a key of PRIORITY_CLASSES
+EngineProfile = namedtuple("EngineProfile", ("threads", "level", "method", "priority"))
+
+PRIORITY_CLASSES = {
+	"idle": subprocess.IDLE_PRIORITY_CLASS,
+	"belowNormal": subprocess.BELOW_NORMAL_PRIORITY_CLASS,
+	"normal": subprocess.NORMAL_PRIORITY_CLASS,
+}
+# Methods 7-Zip can write into both zip and 7z archives
+METHODS = ("", "Deflate", "Deflate64", "BZip2", "LZMA", "PPMd")
+
+PROFILE_STANDARD = "standard"
+PROFILE_BACKGROUND = "background"
+PROFILE_CUSTOM = "custom"
+PROFILES = {
+	PROFILE_STANDARD: EngineProfile(0, None, "", "normal"),
+	# Below normal priority leaves the screen reader a free core whenever it needs one
+	PROFILE_BACKGROUND: EngineProfile(0, None, "", "belowNormal"),
+}
+
+
+def profileFromConfig(conf):
+	"""The EngineProfile chosen in the settings, built from the custom fields for the custom profile."""
+	name = conf.get("sevenZipProfile", PROFILE_STANDARD)
+	if name != PROFILE_CUSTOM:
+		return PROFILES.get(name, PROFILES[PROFILE_STANDARD])
+	level = conf.get("customProfileLevel", -1)
+	method = conf.get("customProfileMethod", "")
+	priority = conf.get("customProfilePriority", "normal")
+	return EngineProfile(
+		max(0, conf.get("customProfileThreads", 0)),
+		level if 0 <= level <= 9 else None,
+		method if method in METHODS else "",
+		priority if priority in PRIORITY_CLASSES else "normal",
+	)
+
+
+def priorityClass(profile):
+	return PRIORITY_CLASSES.get(profile.priority, subprocess.NORMAL_PRIORITY_CLASS)
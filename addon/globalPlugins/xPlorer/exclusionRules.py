@@ -0,0 +1,103 @@
+# exclusionRules.py
+
+import re
+import fnmatch
+
+FILE_ATTRIBUTE_HIDDEN = 0x2
+FILE_ATTRIBUTE_SYSTEM = 0x4
+PATTERN_SEPARATOR = ";"
+
+
+class ExclusionRules:
+	"""Which files and folders Say Size, Folder Info, Compress and Robocopy leave out.
+
+	Patterns are case-insensitive globs matched against a single file or folder
+	name, such as node_modules, *.pyc or Thumbs.db. A pattern ending in a slash
+	only matches folders. Excluded folders are pruned before they are listed, so
+	nothing below them is ever visited. Items that were selected themselves are
+	never excluded, only what is found inside them.
+	"""
+
+	def __init__(self, patterns=(), skipHidden=False, skipSystem=False, maxFileSize=0):
+		self.patterns = [p.strip() for p in patterns if p.strip()]
+		self.skipHidden = skipHidden
+		self.skipSystem = skipSystem
+		# Files larger than this many bytes are excluded; 0 keeps every size
+		self.maxFileSize = maxFileSize
+		self.dirPatterns = [p.rstrip("/\\") for p in self.patterns if p.endswith(("/", "\\"))]
+		self.namePatterns = [p for p in self.patterns if not p.endswith(("/", "\\"))]
+		self._dirRegex = self._compile(self.dirPatterns + self.namePatterns)
+		self._fileRegex = self._compile(self.namePatterns)
+		self._attributeMask = (FILE_ATTRIBUTE_HIDDEN if skipHidden else 0) | (FILE_ATTRIBUTE_SYSTEM if skipSystem else 0)
+
+	@classmethod
+	def fromConfig(cls, conf):
+		patterns = conf.get("exclusionPatterns", "").split(PATTERN_SEPARATOR)
+		return cls(
+			patterns,
+			skipHidden=conf.get("excludeHidden", False),
+			skipSystem=conf.get("excludeSystem", False),
+			maxFileSize=conf.get("excludeFilesLargerThanMB", 0) * 1024 * 1024
+		)
+
+	def _compile(self, patterns):
+		if not patterns:
+			return None
+		return re.compile("|".join(fnmatch.translate(p) for p in patterns), re.IGNORECASE)
+
+	def __bool__(self):
+		return bool(self.patterns or self._attributeMask or self.maxFileSize)
+
+	def signature(self):
+		"""A string that changes whenever the rules would give a different result."""
+		return "|".join([PATTERN_SEPARATOR.join(self.patterns), str(self._attributeMask), str(self.maxFileSize)])
+
+	def needsFileList(self):
+		"""True if some rule cannot be written as a name pattern, such as attributes or size."""
+		return bool(self._attributeMask or self.maxFileSize)
+
+	def _attributes(self, entry):
+		try:
+			return getattr(entry.stat(follow_symlinks=False), "st_file_attributes", 0)
+		except OSError:
+			return 0
+
+	def excludesDirectory(self, entry):
+		"""entry is an os.DirEntry of a folder."""
+		if self._dirRegex and self._dirRegex.match(entry.name):
+			return True
+		return bool(self._attributeMask and self._attributes(entry) & self._attributeMask)
+
+	def excludesFile(self, entry):
+		"""entry is an os.DirEntry of a file whose stat data is already cached."""
+		if self._fileRegex and self._fileRegex.match(entry.name):
+			return True
+		if self._attributeMask and self._attributes(entry) & self._attributeMask:
+			return True
+		if self.maxFileSize:
+			try:
+				return entry.stat().st_size > self.maxFileSize
+			except OSError:
+				return False
+		return False
+
+	def sevenZipSwitches(self):
+		"""7-Zip switches for the name patterns; attribute and size rules need a file list instead."""
+		return ["-xr!" + p for p in self.dirPatterns + self.namePatterns]
+
+	def robocopySwitches(self):
+		switches = []
+		dirPatterns = self.dirPatterns + self.namePatterns
+		if dirPatterns:
+			switches += ["/XD"] + dirPatterns
+		if self.namePatterns:
+			switches += ["/XF"] + self.namePatterns
+		attributes = ("H" if self.skipHidden else "") + ("S" if self.skipSystem else "")
+		if attributes:
+			switches.append("/XA:" + attributes)
+		if self.maxFileSize:
+			switches.append(f"/MAX:{self.maxFileSize}")
+		return switches
+
+
+NO_EXCLUSIONS = ExclusionRules()
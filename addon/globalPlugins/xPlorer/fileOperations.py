@@ -9,13 +9,46 @@ import gui.guiHelper
 import subprocess
 import time
 import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from logHandler import log
 import addonHandler
 import tones
 import core
+from .sizeIndex import getSizeIndex
+from .diskUsage import DiskUsage
+from .exclusionRules import ExclusionRules
+from .config import loadConfig
 
 addonHandler.initTranslation()
 
+# Walks shorter than this are answered with the size alone
+STREAMING_STATS_MIN_SECONDS = 1.0
+# Selected items sized at once; each folder walk has its own directory thread pool as well
+ITEM_WORKERS = 4
+
+SizeResult = namedtuple("SizeResult", ("name", "path", "total_bytes", "file_count", "folder_count", "allocated_bytes", "is_drive"))
+
+def format_size(size_in_bytes):
+	if size_in_bytes < 1024:
+		return f"{size_in_bytes} bytes"
+	elif size_in_bytes < 1024 * 1024:
+		return f"{size_in_bytes / 1024:.2f} KB"
+	elif size_in_bytes < 1024 * 1024 * 1024:
+		return f"{size_in_bytes / (1024 * 1024):.2f} MB"
+	else:
+		return f"{size_in_bytes / (1024 * 1024 * 1024):.2f} GB"
+
+def format_duration(seconds):
+	seconds = max(0, int(round(seconds)))
+	if seconds < 60:
+		return _("{seconds} seconds").format(seconds=seconds)
+	minutes, seconds = divmod(seconds, 60)
+	if minutes < 60:
+		return _("{minutes} minutes {seconds} seconds").format(minutes=minutes, seconds=seconds)
+	hours, minutes = divmod(minutes, 60)
+	return _("{hours} hours {minutes} minutes").format(hours=hours, minutes=minutes)
+
 class RenameDialog(wx.Dialog):
 	def __init__(self, parent, file_name):
 		super().__init__(parent, title="")
@@ -70,14 +103,103 @@ class RenameDialog(wx.Dialog):
 	def _on_close(self, event):
 		self.EndModal(wx.ID_CANCEL)
 
+class SizeBreakdownDialog(wx.Dialog):
+	# (label, sort key, largest first by default)
+	SORT_CHOICES = [
+		(_("Size"), lambda result: result.total_bytes, True),
+		(_("Name"), lambda result: result.name.lower(), False),
+		(_("Files"), lambda result: result.file_count, True),
+	]
+
+	def __init__(self, parent, results, on_disk):
+		super().__init__(parent, title=_("Size breakdown"))
+		self.results = list(results)
+		self.on_disk = on_disk
+		self._sort_index = 0
+		self._descending = True
+		self._init_ui()
+
+	def _init_ui(self):
+		main_sizer = wx.BoxSizer(wx.VERTICAL)
+		s_helper = gui.guiHelper.BoxSizerHelper(self, orientation=wx.VERTICAL)
+
+		self.sort_ctrl = s_helper.addLabeledControl(_("Sort by:"), wx.Choice, choices=[label for label, key, descending in self.SORT_CHOICES])
+		self.sort_ctrl.SetSelection(0)
+
+		self.list_ctrl = s_helper.addLabeledControl(_("Items:"), wx.ListCtrl, style=wx.LC_REPORT | wx.LC_SINGLE_SEL, size=(500, 300))
+		self.list_ctrl.InsertColumn(0, _("Name"))
+		self.list_ctrl.InsertColumn(1, _("Size"))
+		self.list_ctrl.InsertColumn(2, _("Files"))
+		if self.on_disk:
+			self.list_ctrl.InsertColumn(3, _("On disk"))
+
+		btn_sizer = self.CreateButtonSizer(wx.CLOSE)
+		s_helper.addItem(btn_sizer, flag=wx.ALIGN_CENTER)
+
+		main_sizer.Add(s_helper.sizer, 1, wx.EXPAND | wx.ALL, 10)
+		self.SetSizer(main_sizer)
+		self._fill_list()
+		main_sizer.Fit(self)
+		self.CentreOnScreen()
+		self.SetEscapeId(wx.ID_CLOSE)
+
+		self.sort_ctrl.Bind(wx.EVT_CHOICE, self._on_sort_choice)
+		self.list_ctrl.Bind(wx.EVT_LIST_COL_CLICK, self._on_column_click)
+		self.list_ctrl.SetFocus()
+
+	def _fill_list(self):
+		label, key, default_descending = self.SORT_CHOICES[self._sort_index]
+		self.results.sort(key=key, reverse=self._descending)
+		self.list_ctrl.DeleteAllItems()
+		for result in self.results:
+			index = self.list_ctrl.InsertItem(self.list_ctrl.GetItemCount(), result.name)
+			self.list_ctrl.SetItem(index, 1, format_size(result.total_bytes))
+			self.list_ctrl.SetItem(index, 2, str(result.file_count))
+			if self.on_disk:
+				self.list_ctrl.SetItem(index, 3, format_size(result.allocated_bytes))
+		for column in range(self.list_ctrl.GetColumnCount()):
+			self.list_ctrl.SetColumnWidth(column, wx.LIST_AUTOSIZE_USEHEADER)
+		if self.results:
+			self.list_ctrl.Select(0)
+			self.list_ctrl.Focus(0)
+
+	def _on_sort_choice(self, event):
+		self._sort_index = self.sort_ctrl.GetSelection()
+		self._descending = self.SORT_CHOICES[self._sort_index][2]
+		self._fill_list()
+
+	def _on_column_click(self, event):
+		column = event.GetColumn()
+		# The on-disk column sorts like size
+		sort_index = {0: 1, 1: 0, 2: 2}.get(column, 0)
+		if sort_index == self._sort_index:
+			self._descending = not self._descending
+		else:
+			self._sort_index = sort_index
+			self._descending = self.SORT_CHOICES[sort_index][2]
+		self.sort_ctrl.SetSelection(sort_index)
+		self._fill_list()
+
 class FileOperations:
 	def __init__(self, plugin):
 		self.plugin = plugin
 		self.rename_dialog = None
 		self._beep_timer = None
 		self._calculation_active = False
+		# Set to stop the current size run; every run gets a new one, so a run still stopping cannot touch the next
+		self._size_cancel = threading.Event()
+		# Guards the run totals and the flag against a stopped run finishing late
+		self._size_lock = threading.Lock()
 		self._stop_beep_event = threading.Event()
 		self._size_thread = None
+		self._size_selection = None
+		self._size_start_time = 0
+		self._size_expected_files = None
+		# Totals of finished items, and partial totals of the folders still being walked by path
+		self._size_done = (0, 0, 0)
+		self._size_partials = {}
+		self._size_breakdown = []
+		self._size_breakdown_on_disk = False
 
 	def cleanup(self):
 		self._stop_calculation()
@@ -88,6 +210,7 @@ class FileOperations:
 				pass
 
 	def _stop_calculation(self):
+		self._size_cancel.set()
 		self._calculation_active = False
 		self._stop_beeping()
 		if self._size_thread and self._size_thread.is_alive():
@@ -113,31 +236,133 @@ class FileOperations:
 			self._beep_timer.start()
 
 	def _format_size(self, size_in_bytes):
-		if size_in_bytes < 1024:
-			return f"{size_in_bytes} bytes"
-		elif size_in_bytes < 1024 * 1024:
-			return f"{size_in_bytes / 1024:.2f} KB"
-		elif size_in_bytes < 1024 * 1024 * 1024:
-			return f"{size_in_bytes / (1024 * 1024):.2f} MB"
-		else:
-			return f"{size_in_bytes / (1024 * 1024 * 1024):.2f} GB"
+		return format_size(size_in_bytes)
 
-	def _get_folder_size_accurate(self, folder_path):
-		total_size = 0
+	def _measure_folder(self, folder_path, cancel):
+		partials = self._size_partials
+		def on_progress(total_bytes, file_count, folder_count):
+			partials[folder_path] = (total_bytes, file_count, folder_count)
 		try:
-			for root, dirs, files in os.walk(folder_path):
-				if not self._calculation_active:
-					return 0
-				for file_name in files:
-					file_path = os.path.join(root, file_name)
-					try:
-						total_size += os.path.getsize(file_path)
-					except (OSError, WindowsError, PermissionError):
-						pass
-			return total_size
+			return getSizeIndex().measure(folder_path, cancel.is_set, on_progress)
 		except Exception as e:
 			log.error(f"Error calculating folder size for {folder_path}: {e}")
-			return 0
+			return None
+		finally:
+			partials.pop(folder_path, None)
+
+	def _drive_used_size(self, path):
+		"""Used bytes of a drive when path is a drive root such as C:\\, else None."""
+		drive_letter = os.path.splitdrive(path)[0]
+		if not (drive_letter and len(drive_letter) == 2 and drive_letter[1] == ':' and path == drive_letter + "\\"):
+			return None
+		import ctypes
+		free_bytes = ctypes.c_ulonglong(0)
+		total_bytes = ctypes.c_ulonglong(0)
+		if ctypes.windll.kernel32.GetDiskFreeSpaceExW(
+			ctypes.c_wchar_p(path), None,
+			ctypes.byref(total_bytes),
+			ctypes.byref(free_bytes)
+		):
+			return total_bytes.value - free_bytes.value
+		return 0
+
+	def _size_item(self, name, path, cancel):
+		"""Logical size of one selected item, run on the item worker pool."""
+		if cancel.is_set():
+			return None
+		try:
+			if os.path.isfile(path):
+				file_size = os.path.getsize(path)
+				return SizeResult(name, path, file_size, 1, 0, file_size, False)
+			if os.path.isdir(path):
+				used_size = self._drive_used_size(path)
+				if used_size is not None:
+					return SizeResult(name, path, used_size, 0, 0, used_size, True)
+				result = self._measure_folder(path, cancel)
+				if result:
+					return SizeResult(name, path, result[0], result[1], result[2], result[0], False)
+		except Exception as e:
+			log.error(f"Error getting size for {name}: {e}")
+		return None
+
+	def _size_item_on_disk(self, name, path, usage, cancel):
+		"""Size of one selected item in on-disk mode, as the growth of the shared usage totals."""
+		before = (usage.logicalBytes, usage.fileCount, usage.folderCount, usage.allocatedBytes)
+
+		def delta():
+			return (
+				usage.logicalBytes - before[0],
+				usage.fileCount - before[1],
+				usage.folderCount - before[2],
+				usage.allocatedBytes - before[3],
+			)
+
+		partials = self._size_partials
+		def on_progress():
+			partials[path] = delta()[:3]
+		try:
+			if os.path.isfile(path):
+				usage.addFile(path)
+			elif os.path.isdir(path):
+				used_size = self._drive_used_size(path)
+				if used_size is not None:
+					return SizeResult(name, path, used_size, 0, 0, used_size, True)
+				usage.addFolder(path, cancel.is_set, on_progress)
+			else:
+				return None
+		except Exception as e:
+			log.error(f"Error calculating disk usage for {name}: {e}")
+		finally:
+			partials.pop(path, None)
+		total_bytes, file_count, folder_count, allocated_bytes = delta()
+		return SizeResult(name, path, total_bytes, file_count, folder_count, allocated_bytes, False)
+
+	def _add_finished_item(self, result, cancel):
+		with self._size_lock:
+			if cancel.is_set():
+				return
+			done = self._size_done
+			self._size_done = (done[0] + result.total_bytes, done[1] + result.file_count, done[2] + result.folder_count)
+
+	def _size_items_concurrently(self, items, cancel):
+		results = []
+		with ThreadPoolExecutor(max_workers=ITEM_WORKERS, thread_name_prefix="xPlorerSize") as executor:
+			futures = [executor.submit(self._size_item, name, path, cancel) for name, path in items]
+			for future in as_completed(futures):
+				result = future.result()
+				if result:
+					results.append(result)
+					self._add_finished_item(result, cancel)
+		return results
+
+	def _expected_file_count(self, paths):
+		"""File count the selection had when it was last measured completely, if known for every folder."""
+		index = getSizeIndex()
+		expected = 0
+		for path in paths:
+			if os.path.isdir(path):
+				totals = index.lastTotals(path)
+				if not totals:
+					return None
+				expected += totals[1]
+			else:
+				expected += 1
+		return expected
+
+	def _say_running_total(self):
+		totals = [self._size_done] + list(dict(self._size_partials).values())
+		total_bytes, file_count, folder_count = (sum(column) for column in zip(*totals))
+		message = _("{size} so far, {files} files, {folders} folders").format(
+			size=self._format_size(total_bytes),
+			files=file_count,
+			folders=folder_count
+		)
+		elapsed = time.monotonic() - self._size_start_time
+		expected = self._size_expected_files
+		if expected and file_count and expected > file_count and elapsed > 0:
+			remaining = (expected - file_count) / (file_count / elapsed)
+			message += ", " + _("about {time} left").format(time=format_duration(remaining))
+		ui.message(message)
 
 	def _check_access_permission(self, path):
 		try:
@@ -164,6 +389,12 @@ class FileOperations:
 			ui.message(_("No items selected"))
 			return
 		
+		selection = tuple(path for name, path in selected_items)
+		if self._calculation_active and selection == self._size_selection:
+			# Asking again for the same selection while it is still being walked reports progress
+			self._say_running_total()
+			return
+		
 		inaccessible_items = []
 		for name, path in selected_items:
 			if not self._check_access_permission(path):
@@ -174,82 +405,121 @@ class FileOperations:
 			return
 		
 		self._stop_calculation()
-		self._calculation_active = True
+		cancel = threading.Event()
+		with self._size_lock:
+			self._size_cancel = cancel
+			self._calculation_active = True
+			self._size_selection = selection
+			self._size_start_time = time.monotonic()
+			self._size_done = (0, 0, 0)
+			self._size_partials = {}
 		self._start_beeping()
 		
+		conf = loadConfig()
+		on_disk = conf.get("sizeAccounting", "logical") == "onDisk"
+		
 		def calculate_size():
 			try:
-				total_size = 0
-				accessible_item_count = 0
-				is_drive = False
-				
-				for name, path in selected_items:
-					if not self._calculation_active:
-						break
-					if name in inaccessible_items:
-						continue
-						
-					accessible_item_count += 1
-					
-					if os.path.isfile(path):
-						try:
-							file_size = os.path.getsize(path)
-							total_size += file_size
-						except Exception as e:
-							log.error(f"Error getting file size for {name}: {e}")
-							
-					elif os.path.isdir(path):
-						try:
-							drive_letter = os.path.splitdrive(path)[0]
-							if drive_letter and len(drive_letter) == 2 and drive_letter[1] == ':':
-								if path == drive_letter + "\\":
-									is_drive = True
-									import ctypes
-									free_bytes = ctypes.c_ulonglong(0)
-									total_bytes = ctypes.c_ulonglong(0)
-									if ctypes.windll.kernel32.GetDiskFreeSpaceExW(
-										ctypes.c_wchar_p(path), None,
-										ctypes.byref(total_bytes),
-										ctypes.byref(free_bytes)
-									):
-										used_size = total_bytes.value - free_bytes.value
-										total_size += used_size
-									continue
-							
-							folder_size = self._get_folder_size_accurate(path)
-							total_size += folder_size
-						except Exception as e:
-							log.error(f"Error getting folder size for {name}: {e}")
+				self._size_expected_files = self._expected_file_count(selection)
+				items = [(name, path) for name, path in selected_items if name not in inaccessible_items]
+				usage = None
+				if on_disk:
+					# Hardlinks are shared across items, so on-disk items are measured one after another
+					usage = DiskUsage(ExclusionRules.fromConfig(conf))
+					results = []
+					for name, path in items:
+						if cancel.is_set():
+							break
+						result = self._size_item_on_disk(name, path, usage, cancel)
+						if result:
+							results.append(result)
+							self._add_finished_item(result, cancel)
+				else:
+					results = self._size_items_concurrently(items, cancel)
 				
+				with self._size_lock:
+					if cancel.is_set():
+						# A stopped run leaves the beeps and the flag to the run that replaced it
+						return
+					self._calculation_active = False
 				self._stop_beeping()
-				self._calculation_active = False
 				
-				formatted_size = self._format_size(total_size)
+				results.sort(key=lambda result: result.total_bytes, reverse=True)
+				self._size_breakdown = results
+				self._size_breakdown_on_disk = on_disk
+				
+				total_size = sum(result.total_bytes for result in results)
+				file_count = sum(result.file_count for result in results)
+				accessible_item_count = len(items)
+				
+				if usage:
+					formatted_size = _("{size}, {allocated} on disk").format(
+						size=self._format_size(total_size),
+						allocated=self._format_size(sum(result.allocated_bytes for result in results))
+					)
+					if usage.duplicateLinks:
+						formatted_size += ", " + _("{count} hardlinked duplicates counted once").format(count=usage.duplicateLinks)
+				else:
+					formatted_size = self._format_size(total_size)
 				
 				if accessible_item_count == 0:
 					display_message = _("No access to size data")
 				elif accessible_item_count == 1:
-					if is_drive:
-						display_message = formatted_size
-					else:
-						display_message = formatted_size
+					display_message = formatted_size
 				else:
 					display_message = _("{count} items {size}").format(
 						count=accessible_item_count, 
 						size=formatted_size
 					)
 				
+				elapsed = time.monotonic() - self._size_start_time
+				if accessible_item_count and file_count and elapsed >= STREAMING_STATS_MIN_SECONDS:
+					display_message += ", " + _("{files} files in {time}, {rate} files per second").format(
+						files=file_count,
+						time=format_duration(elapsed),
+						rate=int(file_count / elapsed)
+					)
+				
 				core.callLater(0, ui.message, display_message)
 				
 			except Exception as e:
 				log.error(f"Error in size calculation thread: {e}")
+				with self._size_lock:
+					if cancel.is_set():
+						return
+					self._calculation_active = False
 				self._stop_beeping()
-				self._calculation_active = False
 				core.callLater(0, ui.message, _("Error calculating size"))
 		
 		self._size_thread = threading.Thread(target=calculate_size, daemon=True)
 		self._size_thread.start()
 
+	def showSizeBreakdown(self):
+		if self._calculation_active:
+			ui.message(_("Size calculation still running"))
+			return
+		if not self._size_breakdown:
+			ui.message(_("No size breakdown yet, use Say size first"))
+			return
+		wx.CallAfter(self._show_size_breakdown_dialog, list(self._size_breakdown), self._size_breakdown_on_disk)
+
+	def _show_size_breakdown_dialog(self, results, on_disk):
+		dialog = None
+		try:
+			if gui.mainFrame:
+				gui.mainFrame.prePopup()
+			dialog = SizeBreakdownDialog(gui.mainFrame, results, on_disk)
+			dialog.Raise()
+			dialog.ShowModal()
+		except Exception as e:
+			log.error(f"Error showing size breakdown dialog: {e}")
+			ui.message(_("Error opening size breakdown"))
+		finally:
+			if dialog:
+				dialog.Destroy()
+			if gui.mainFrame:
+				gui.mainFrame.postPopup()
+
 	def renameFile(self):
 		focus = api.getFocusObject()
 		if not focus or focus.appModule.appName != "explorer":
@@ -1,49 +1,181 @@
 # folderInfo.py
 
 import os
+import time
+import heapq
 import threading
 import wx
+import gui
+import gui.guiHelper
 import ui
 import addonHandler
 import speech
 import core
 from logHandler import log
+from .sizeIndex import getSizeIndex
+from .treeWalker import walkTree, ruleScanner
+from .exclusionRules import ExclusionRules
+from .fileOperations import format_size
+from .treeEstimate import estimateTree
+from .config import loadConfig
 
 addonHandler.initTranslation()
 
+LARGEST_FILES_COUNT = 50
+
+
+class FolderStatistics:
+	"""Everything Folder Info details reports, gathered in a single walk."""
+
+	def __init__(self, folder_path, largest_count=LARGEST_FILES_COUNT):
+		self.folder_path = folder_path
+		self.total_bytes = 0
+		self.file_count = 0
+		self.subfolder_count = 0
+		self.max_depth = 0
+		# extension -> [file count, bytes]
+		self.extensions = {}
+		self.newest = None
+		self.oldest = None
+		self._largest_count = largest_count
+		# Min-heap of (size, path), so the smallest of the kept files is dropped first
+		self._largest = []
+
+	def add_scan(self, scan):
+		self.subfolder_count += len(scan.subdirs)
+		if scan.subdirs and scan.depth + 1 > self.max_depth:
+			self.max_depth = scan.depth + 1
+		for entry in scan.files:
+			st = entry.stat()
+			size = st.st_size
+			mtime = st.st_mtime
+			self.total_bytes += size
+			self.file_count += 1
+			ext = os.path.splitext(entry.name)[1].lower()
+			stats = self.extensions.get(ext)
+			if stats is None:
+				self.extensions[ext] = [1, size]
+			else:
+				stats[0] += 1
+				stats[1] += size
+			if len(self._largest) < self._largest_count:
+				heapq.heappush(self._largest, (size, entry.path))
+			elif size > self._largest[0][0]:
+				heapq.heapreplace(self._largest, (size, entry.path))
+			if self.newest is None or mtime > self.newest[0]:
+				self.newest = (mtime, entry.path)
+			if self.oldest is None or mtime < self.oldest[0]:
+				self.oldest = (mtime, entry.path)
+
+	def largest_files(self):
+		return sorted(self._largest, reverse=True)
+
+	def extensions_by_size(self):
+		return sorted(self.extensions.items(), key=lambda item: item[1][1], reverse=True)
+
+
+class FolderDetailsDialog(wx.Dialog):
+	def __init__(self, parent, stats):
+		super().__init__(parent, title=_("Folder details: {name}").format(name=os.path.basename(stats.folder_path) or stats.folder_path))
+		self.stats = stats
+		self._init_ui()
+
+	def _format_time(self, item):
+		if item is None:
+			return _("none")
+		mtime, path = item
+		return "{time}, {name}".format(time=time.strftime("%Y-%m-%d %H:%M", time.localtime(mtime)), name=os.path.relpath(path, self.stats.folder_path))
+
+	def _init_ui(self):
+		stats = self.stats
+		main_sizer = wx.BoxSizer(wx.VERTICAL)
+		s_helper = gui.guiHelper.BoxSizerHelper(self, orientation=wx.VERTICAL)
+
+		summary = "\n".join([
+			_("Size: {size}").format(size=format_size(stats.total_bytes)),
+			_("{subfolders} subfolders and {files} files").format(subfolders=stats.subfolder_count, files=stats.file_count),
+			_("Deepest level: {depth}").format(depth=stats.max_depth),
+			_("Newest: {item}").format(item=self._format_time(stats.newest)),
+			_("Oldest: {item}").format(item=self._format_time(stats.oldest)),
+		])
+		summary_ctrl = s_helper.addLabeledControl(_("Summary:"), wx.TextCtrl, value=summary, style=wx.TE_MULTILINE | wx.TE_READONLY, size=(500, 110))
+
+		types_list = s_helper.addLabeledControl(_("File types:"), wx.ListCtrl, style=wx.LC_REPORT | wx.LC_SINGLE_SEL, size=(500, 180))
+		types_list.InsertColumn(0, _("Extension"))
+		types_list.InsertColumn(1, _("Files"))
+		types_list.InsertColumn(2, _("Size"))
+		for ext, (count, size) in stats.extensions_by_size():
+			index = types_list.InsertItem(types_list.GetItemCount(), ext or _("(no extension)"))
+			types_list.SetItem(index, 1, str(count))
+			types_list.SetItem(index, 2, format_size(size))
+
+		largest_list = s_helper.addLabeledControl(_("Largest files:"), wx.ListCtrl, style=wx.LC_REPORT | wx.LC_SINGLE_SEL, size=(500, 180))
+		largest_list.InsertColumn(0, _("Name"))
+		largest_list.InsertColumn(1, _("Size"))
+		largest_list.InsertColumn(2, _("Folder"))
+		for size, path in stats.largest_files():
+			index = largest_list.InsertItem(largest_list.GetItemCount(), os.path.basename(path))
+			largest_list.SetItem(index, 1, format_size(size))
+			largest_list.SetItem(index, 2, os.path.relpath(os.path.dirname(path), stats.folder_path))
+
+		for list_ctrl in (types_list, largest_list):
+			for column in range(list_ctrl.GetColumnCount()):
+				list_ctrl.SetColumnWidth(column, wx.LIST_AUTOSIZE_USEHEADER)
+			if list_ctrl.GetItemCount():
+				list_ctrl.Select(0)
+				list_ctrl.Focus(0)
+
+		btn_sizer = self.CreateButtonSizer(wx.CLOSE)
+		s_helper.addItem(btn_sizer, flag=wx.ALIGN_CENTER)
+
+		main_sizer.Add(s_helper.sizer, 1, wx.EXPAND | wx.ALL, 10)
+		self.SetSizer(main_sizer)
+		main_sizer.Fit(self)
+		self.CentreOnScreen()
+		self.SetEscapeId(wx.ID_CLOSE)
+		summary_ctrl.SetFocus()
+
+
 class FolderInfoManager:
 	def __init__(self, plugin):
 		self.plugin = plugin
 		self._stop_walk = False
+		self._estimate_lock = threading.Lock()
 
 	def cleanup(self):
 		self._stop_walk = True
 
 	def get_folder_info(self):
+		self._with_selected_folder(self._calculate_folder_info_streaming)
+
+	def get_folder_details(self):
+		self._with_selected_folder(self._collect_folder_details)
+
+	def _with_selected_folder(self, worker):
 		speech.cancelSpeech()
 		self.plugin.manager.suppressAllAnnouncements = True
 		self._stop_walk = False
-		
+
 		def delayed_retrieve():
 			selected_items, _ignore = self.plugin._getSelectedItems()
 			if not selected_items:
 				wx.CallAfter(ui.message, _("No item selected"))
 				self._restore_speech()
 				return
-			
+
 			if len(selected_items) > 1:
 				wx.CallAfter(ui.message, _("Please select only one folder"))
 				self._restore_speech()
 				return
-			
+
 			folder_path = selected_items[0][1]
 			if not os.path.isdir(folder_path):
 				wx.CallAfter(ui.message, _("Selected item is not a folder"))
 				self._restore_speech()
 				return
-			
-			threading.Thread(target=self._calculate_folder_info_streaming, args=(folder_path,), daemon=True).start()
-		
+
+			threading.Thread(target=worker, args=(folder_path,), daemon=True).start()
+
 		core.callLater(500, delayed_retrieve)
 
 	def _restore_speech(self):
@@ -51,22 +183,93 @@ class FolderInfoManager:
 
 	def _calculate_folder_info_streaming(self, folder_path):
 		try:
-			subfolder_count = 0
-			file_count = 0
-			for root, dirs, files in os.walk(folder_path):
-				if self._stop_walk:
-					break
-				subfolder_count += len(dirs)
-				file_count += len(files)
-			
+			exact_done = threading.Event()
+			estimate_state = {"announced": False}
+			budget = loadConfig().get("folderInfoTimeBudget", 5)
+			if budget > 0:
+				threading.Thread(target=self._announce_estimate, args=(folder_path, budget, exact_done, estimate_state), daemon=True).start()
+			result = getSizeIndex().measure(folder_path, lambda: self._stop_walk)
+			with self._estimate_lock:
+				exact_done.set()
+				estimate_announced = estimate_state["announced"]
+			if result is None:
+				return
+			_size, file_count, subfolder_count = result
 			message = _("{subfolders} subfolders and {files} files").format(
 				subfolders=subfolder_count,
 				files=file_count
 			)
-			wx.CallAfter(speech.cancelSpeech)
+			if estimate_announced:
+				message = _("Exact count: {message}").format(message=message)
+			else:
+				wx.CallAfter(speech.cancelSpeech)
 			wx.CallAfter(ui.message, message)
 			wx.CallAfter(self._restore_speech)
 		except Exception as e:
 			log.error(f"Error calculating folder info: {e}")
 			wx.CallAfter(ui.message, _("Error calculating folder info"))
-			wx.CallAfter(self._restore_speech)
\ No newline at end of file
+			wx.CallAfter(self._restore_speech)
+
+	def _announce_estimate(self, folder_path, budget, exact_done, estimate_state):
+		"""Sample the tree while the exact count runs, and speak an estimate if the budget runs out first."""
+		try:
+			estimate = estimateTree(
+				folder_path,
+				getSizeIndex().lookup,
+				time.monotonic() + budget,
+				lambda: self._stop_walk or exact_done.is_set()
+			)
+		except Exception as e:
+			log.error(f"Error estimating folder info: {e}")
+			return
+		if estimate is None:
+			return
+		if estimate.relativeError is None:
+			accuracy = _("rough estimate")
+		else:
+			accuracy = _("plus or minus {percent} percent").format(percent=max(1, int(round(estimate.relativeError * 100))))
+		message = _("About {subfolders} subfolders and {files} files, {size}, {accuracy}. Still counting").format(
+			subfolders=estimate.subfolderCount,
+			files=estimate.fileCount,
+			size=format_size(estimate.totalBytes),
+			accuracy=accuracy
+		)
+		with self._estimate_lock:
+			if exact_done.is_set():
+				return
+			estimate_state["announced"] = True
+		wx.CallAfter(speech.cancelSpeech)
+		wx.CallAfter(ui.message, message)
+		# The exact count may take much longer, so Explorer speech is not held back for it
+		wx.CallAfter(self._restore_speech)
+
+	def _collect_folder_details(self, folder_path):
+		try:
+			wx.CallAfter(ui.message, _("Collecting folder details"))
+			stats = FolderStatistics(folder_path)
+			scanner = ruleScanner(ExclusionRules.fromConfig(loadConfig()))
+			for scan in walkTree(folder_path, scanner=scanner, isCancelled=lambda: self._stop_walk):
+				stats.add_scan(scan)
+			if self._stop_walk:
+				return
+			wx.CallAfter(self._restore_speech)
+			wx.CallAfter(self._show_details_dialog, stats)
+		except Exception as e:
+			log.error(f"Error collecting folder details: {e}")
+			wx.CallAfter(ui.message, _("Error calculating folder info"))
+			wx.CallAfter(self._restore_speech)
+
+	def _show_details_dialog(self, stats):
+		dialog = None
+		try:
+			gui.mainFrame.prePopup()
+			dialog = FolderDetailsDialog(gui.mainFrame, stats)
+			dialog.Raise()
+			dialog.ShowModal()
+		except Exception as e:
+			log.error(f"Error showing folder details: {e}")
+			ui.message(_("Error opening folder details"))
+		finally:
+			if dialog:
+				dialog.Destroy()
+			gui.mainFrame.postPopup()
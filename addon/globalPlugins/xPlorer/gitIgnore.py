@@ -0,0 +1,216 @@
+# gitIgnore.py
+
+import os
+import re
+import threading
+from logHandler import log
+
+GITIGNORE_NAME = ".gitignore"
+GIT_DIR_NAME = ".git"
+# How far above the selected folder to look for the root of its repository
+MAX_REPOSITORY_DEPTH = 32
+
+
+def _translate(pattern):
+	"""Regex body for a gitignore glob, matched against a path relative to the .gitignore folder."""
+	parts = []
+	i = 0
+	n = len(pattern)
+	while i < n:
+		c = pattern[i]
+		if c == "*":
+			if pattern.startswith("**", i):
+				atStart = i == 0 or pattern[i - 1] == "/"
+				atEnd = i + 2 == n
+				if atStart and atEnd:
+					parts.append(".*")
+					i += 2
+					continue
+				if atStart and pattern.startswith("/", i + 2):
+					parts.append("(?:.*/)?")
+					i += 3
+					continue
+			parts.append("[^/]*")
+			while i < n and pattern[i] == "*":
+				i += 1
+			continue
+		if c == "?":
+			parts.append("[^/]")
+		elif c == "[":
+			end = pattern.find("]", i + 2)
+			if end == -1:
+				parts.append(re.escape(c))
+			else:
+				body = pattern[i + 1:end]
+				if body.startswith("!"):
+					body = "^" + body[1:]
+				parts.append("[" + body.replace("\\", "\\\\") + "]")
+				i = end
+		elif c == "\\" and i + 1 < n:
+			i += 1
+			parts.append(re.escape(pattern[i]))
+		else:
+			parts.append(re.escape(c))
+		i += 1
+	return "".join(parts)
+
+
+class GitIgnoreFile:
+	"""The compiled rules of a single .gitignore, evaluated against paths below its folder."""
+
+	def __init__(self, basePath, lines):
+		self.basePath = basePath
+		# (regex, negated, directories only), in file order because the last match wins
+		self.rules = []
+		for line in lines:
+			rule = self._compileLine(line)
+			if rule:
+				self.rules.append(rule)
+
+	@classmethod
+	def load(cls, folderPath):
+		"""The compiled .gitignore of folderPath, or None when it has none."""
+		path = os.path.join(folderPath, GITIGNORE_NAME)
+		try:
+			with open(path, "r", encoding="utf-8", errors="replace") as f:
+				lines = f.read().splitlines()
+		except FileNotFoundError:
+			return None
+		except OSError as e:
+			log.debug(f"Cannot read {path}: {e}")
+			return None
+		ignoreFile = cls(folderPath, lines)
+		return ignoreFile if ignoreFile.rules else None
+
+	def _compileLine(self, line):
+		if not line or line.startswith("#"):
+			return None
+		# Trailing spaces are ignored unless escaped
+		stripped = line.rstrip(" ")
+		if stripped.endswith("\\") and len(stripped) < len(line):
+			stripped += " "
+		line = stripped
+		negated = line.startswith("!")
+		if negated:
+			line = line[1:]
+		elif line.startswith("\\!") or line.startswith("\\#"):
+			line = line[1:]
+		dirOnly = line.endswith("/")
+		line = line.rstrip("/")
+		if not line:
+			return None
+		# A slash anywhere but at the end anchors the pattern to this .gitignore's folder
+		anchored = "/" in line
+		line = line.lstrip("/")
+		body = _translate(line)
+		if not anchored:
+			body = "(?:.*/)?" + body
+		return re.compile(body + r"\Z", re.IGNORECASE | re.DOTALL), negated, dirOnly
+
+	def match(self, relPath, isDir):
+		"""True if ignored, False if re-included by a negation, None if no rule applies."""
+		result = None
+		for regex, negated, dirOnly in self.rules:
+			if dirOnly and not isDir:
+				continue
+			if regex.match(relPath):
+				result = not negated
+		return result
+
+
+class GitIgnoreRules:
+	"""Exclusion rules that add .gitignore files, nested ones included, to other rules.
+
+	Every folder's .gitignore is read and compiled once, the first time an entry of
+	that folder is checked, and the chain of ignore files that applies in a folder
+	is cached with it. When the walked folder lies inside a repository, the
+	.gitignore files between the repository root and that folder apply too.
+	Ignored folders are pruned, so, as in git, nothing below them can be
+	re-included. With collectIgnored, the paths of ignored files and of the
+	topmost ignored folders are kept in ignoredFiles and ignoredDirs.
+	"""
+
+	def __init__(self, baseRules=None, collectIgnored=False):
+		self.baseRules = baseRules
+		self.collectIgnored = collectIgnored
+		self.ignoredFiles = []
+		self.ignoredDirs = []
+		self._chains = {}
+		self._lock = threading.Lock()
+
+	def __bool__(self):
+		return True
+
+	def needsFileList(self):
+		return True
+
+	def _key(self, path):
+		return os.path.normcase(os.path.normpath(path))
+
+	def _repositoryRoot(self, folderPath):
+		path = os.path.abspath(folderPath)
+		for _level in range(MAX_REPOSITORY_DEPTH):
+			if os.path.exists(os.path.join(path, GIT_DIR_NAME)):
+				return path
+			parent = os.path.dirname(path)
+			if parent == path:
+				break
+			path = parent
+		return None
+
+	def _chainFor(self, folderPath):
+		"""The ignore files that apply inside folderPath, outermost first."""
+		key = self._key(folderPath)
+		with self._lock:
+			chain = self._chains.get(key)
+		if chain is not None:
+			return chain
+		parent = os.path.dirname(folderPath)
+		with self._lock:
+			parentChain = self._chains.get(self._key(parent))
+		if parentChain is None:
+			# First folder of a walk: collect the ignore files from the repository root down
+			parentChain = ()
+			root = self._repositoryRoot(folderPath)
+			if root and self._key(root) != key:
+				ancestors = []
+				path = parent
+				while True:
+					ancestors.append(path)
+					if self._key(path) == self._key(root) or os.path.dirname(path) == path:
+						break
+					path = os.path.dirname(path)
+				parentChain = tuple(f for f in (GitIgnoreFile.load(p) for p in reversed(ancestors)) if f)
+		own = GitIgnoreFile.load(folderPath)
+		chain = parentChain + (own,) if own else parentChain
+		with self._lock:
+			self._chains[key] = chain
+		return chain
+
+	def _ignored(self, entry, isDir):
+		chain = self._chainFor(os.path.dirname(entry.path))
+		result = None
+		for ignoreFile in chain:
+			relPath = entry.path[len(ignoreFile.basePath):].lstrip("\\/").replace("\\", "/")
+			match = ignoreFile.match(relPath, isDir)
+			if match is not None:
+				result = match
+		return bool(result)
+
+	def excludesDirectory(self, entry):
+		if self.baseRules and self.baseRules.excludesDirectory(entry):
+			return True
+		if entry.name == GIT_DIR_NAME or not self._ignored(entry, True):
+			return False
+		if self.collectIgnored:
+			self.ignoredDirs.append(entry.path)
+		return True
+
+	def excludesFile(self, entry):
+		if self.baseRules and self.baseRules.excludesFile(entry):
+			return True
+		if not self._ignored(entry, False):
+			return False
+		if self.collectIgnored:
+			self.ignoredFiles.append(entry.path)
+		return True
@@ -0,0 +1,108 @@
+# parallelUnzip.py
+
+import os
+import re
+import time
+import zipfile
+from .archivePool import ZipReaderPool, READ_CHUNK_SIZE
+
+WINDOWS_ILLEGAL_CHARS_RE = re.compile(r'[\x00-\x1f<>:"|?*]')
+
+
+def safeMemberPath(destination, name):
+	"""Where a member named name goes below destination, or None if nothing of the name is left.
+
+	Drive letters, absolute paths, "." and ".." are dropped, so no member can be
+	written outside destination, and characters Windows does not allow are replaced.
+	"""
+	parts = []
+	for part in name.replace("\\", "/").split("/"):
+		part = WINDOWS_ILLEGAL_CHARS_RE.sub("_", os.path.splitdrive(part)[1]).rstrip(" .")
+		if part and part not in (".", ".."):
+			parts.append(part)
+	if not parts:
+		return None
+	return os.path.join(destination, *parts)
+
+
+def freePath(path, taken=None):
+	"""path, or "name (n).ext" next to it when path already exists.
+
+	taken, a set of lower cased paths claimed but not yet written, is checked as
+	well and receives the result, so names handed out together never collide,
+	even when they differ only by case.
+	"""
+	name, ext = os.path.splitext(path)
+	candidate = path
+	counter = 1
+	while os.path.exists(candidate) or (taken is not None and candidate.lower() in taken):
+		candidate = f"{name} ({counter}){ext}"
+		counter += 1
+	if taken is not None:
+		taken.add(candidate.lower())
+	return candidate
+
+
+class ParallelUnzipEngine(ZipReaderPool):
+	"""Extracts a ZIP archive with members decompressed on a thread pool.
+
+	All folders are created up front in one pass, before any file is written.
+	Progress is counted in uncompressed bytes after every chunk, and
+	cancellation is checked as often. Existing files are never overwritten; the
+	extracted copy gets a free name next to them.
+	"""
+
+	def __init__(self, zipPath, destination, maxWorkers=None, isCancelled=None, onProgress=None):
+		# onProgress(bytes written, total bytes), called from the thread running run()
+		super().__init__(zipPath, maxWorkers, isCancelled, onProgress)
+		self.destination = destination
+
+	def _plan(self, infos):
+		"""(ZipInfo, free target path) for every file, after creating every folder.
+
+		Every target is chosen here, on one thread, before any worker starts, so
+		members whose cleaned names are the same get names of their own.
+		"""
+		folders = {self.destination}
+		files = []
+		for info in infos:
+			target = safeMemberPath(self.destination, info.filename)
+			if target is None:
+				continue
+			if info.is_dir():
+				folders.add(target)
+			else:
+				folders.add(os.path.dirname(target))
+				files.append((info, target))
+		for folder in sorted(folders):
+			os.makedirs(folder, exist_ok=True)
+		taken = set()
+		return [(info, freePath(target, taken)) for info, target in files]
+
+	def _extractMember(self, info, target):
+		"""Runs on a worker thread. Returns False if cancelled part way."""
+		# Exclusive create: a file that appeared since _plan is never overwritten
+		with self._archive().open(info) as source, open(target, "xb") as output:
+			while True:
+				if self._cancelled():
+					break
+				chunk = source.read(READ_CHUNK_SIZE)
+				if not chunk:
+					break
+				output.write(chunk)
+				self._addBytes(len(chunk))
+		if self._cancelled():
+			os.remove(target)
+			return False
+		mtime = time.mktime(info.date_time + (0, 0, -1))
+		os.utime(target, (mtime, mtime))
+		return True
+
+	def run(self):
+		"""Extract every member. Returns False if cancelled."""
+		with zipfile.ZipFile(self.zipPath) as archive:
+			infos = archive.infolist()
+		files = self._plan(infos)
+		self.totalBytes = sum(info.file_size for info, _target in files)
+		tasks = ((None, self._extractMember, (info, target)) for info, target in files)
+		return self._runTasks(tasks, "xPlorerUnzip")
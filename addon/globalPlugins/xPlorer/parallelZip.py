@@ -0,0 +1,231 @@
+# parallelZip.py
+
+import os
+import time
+import zlib
+import struct
+import tempfile
+import zipfile
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from .zipWriter import ZipWriter
+from .splitVolumes import SplitVolumeFile
+from .compressionPolicy import chooseMethod
+from .archivePool import defaultWorkers, READ_CHUNK_SIZE, INFLIGHT_PER_WORKER
+
+DEFAULT_LEVEL = 6
+# Compressed members up to this size stay in memory until they are written
+SPOOL_MAX_SIZE = 4 * 1024 * 1024
+# Larger files are streamed straight into the archive instead of being compressed ahead
+STREAM_THRESHOLD = 64 * 1024 * 1024
+# Read buffer of a streamed file, reused for every chunk so memory does not grow with the file
+STREAM_CHUNK_SIZE = 8 * 1024 * 1024
+LOCAL_HEADER_SIZE = 30
+# Modification times in a zip have a resolution of two seconds
+ZIP_TIME_TOLERANCE = 2
+
+# path: file to read; arcname: name inside the archive; size: size in bytes when listed;
+# reuse: ZipInfo of the same, unchanged file in the archive being updated, if any
+ZipMember = namedtuple("ZipMember", ("path", "arcname", "size", "reuse"), defaults=(None,))
+CompressedMember = namedtuple("CompressedMember", ("mtime", "method", "crc", "compressedSize", "fileSize", "data"))
+
+
+def _openCompressor(method, level):
+	"""A raw deflate compressor for method, or None when the member is stored."""
+	if method == zipfile.ZIP_STORED:
+		return None
+	return zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+
+def compressMember(path, level=DEFAULT_LEVEL, storeIncompressible=True, isCancelled=None):
+	"""Deflate or store a whole file into a spooled temporary file. Runs on a worker thread.
+
+	zlib releases the GIL while it compresses and computes CRCs, so several of these
+	run truly in parallel. With storeIncompressible, files that chooseMethod expects
+	not to shrink are copied as they are. Returns None if cancelled part way.
+	"""
+	data = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+	try:
+		crc = 0
+		fileSize = 0
+		with open(path, "rb") as f:
+			st = os.fstat(f.fileno())
+			chunk = f.read(READ_CHUNK_SIZE)
+			method = chooseMethod(path, st.st_size, chunk) if storeIncompressible else zipfile.ZIP_DEFLATED
+			compressor = _openCompressor(method, level)
+			while chunk:
+				if isCancelled and isCancelled():
+					data.close()
+					return None
+				crc = zlib.crc32(chunk, crc)
+				fileSize += len(chunk)
+				data.write(compressor.compress(chunk) if compressor else chunk)
+				chunk = f.read(READ_CHUNK_SIZE)
+		if compressor:
+			data.write(compressor.flush())
+		compressedSize = data.tell()
+		data.seek(0)
+		return CompressedMember(st.st_mtime, method, crc, compressedSize, fileSize, data)
+	except BaseException:
+		data.close()
+		raise
+
+
+def readArchiveIndex(zipPath, reusableOnly=True):
+	"""ZipInfo of the files in an existing archive, by name with forward slashes.
+
+	With reusableOnly, members that cannot be copied as they are, because they are
+	encrypted or use another method, are left out and will be compressed again.
+	"""
+	with zipfile.ZipFile(zipPath) as archive:
+		return {
+			info.filename: info for info in archive.infolist()
+			if not info.is_dir() and (not reusableOnly or (
+				info.compress_type in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED) and not info.flag_bits & 0x1
+			))
+		}
+
+
+def isUnchanged(info, size, mtime):
+	"""True if the archived member info still matches a file of this size and modification time."""
+	if info.file_size != size:
+		return False
+	archivedTime = time.mktime(info.date_time + (0, 0, -1))
+	return abs(archivedTime - mtime) <= ZIP_TIME_TOLERANCE
+
+
+class ParallelZipEngine:
+	"""Builds a ZIP archive with members deflated on a thread pool.
+
+	Files are compressed ahead by up to INFLIGHT_PER_WORKER members per worker and
+	appended to the archive in their original order by the calling thread, so
+	throughput scales with the number of cores on folders of many files while
+	memory stays bounded. Files of STREAM_THRESHOLD bytes or more are deflated by
+	the calling thread straight into the archive through one reused buffer, while
+	the workers keep compressing the members after them; progress is reported and
+	cancellation checked after every chunk of such a file, so a file of many
+	gigabytes neither hides its progress nor delays a cancel. With storeIncompressible, members that
+	would not shrink, such as photos, videos and other archives, are stored.
+	Members with a reuse ZipInfo have their compressed bytes copied from the
+	archive at reuseArchive without being compressed again. With volumeSize, the
+	archive is written straight into volumes of that many bytes.
+	"""
+
+	def __init__(self, zipPath, level=DEFAULT_LEVEL, maxWorkers=None, isCancelled=None, onProgress=None, storeIncompressible=True, reuseArchive=None, volumeSize=0):
+		self.zipPath = zipPath
+		self.volumeSize = volumeSize
+		self.reuseArchive = reuseArchive
+		self.level = level
+		self.storeIncompressible = storeIncompressible
+		self.maxWorkers = maxWorkers or defaultWorkers()
+		self.isCancelled = isCancelled
+		# onProgress(bytes of source files written so far)
+		self.onProgress = onProgress
+		self.bytesDone = 0
+
+	def _cancelled(self):
+		return bool(self.isCancelled and self.isCancelled())
+
+	def run(self, members):
+		"""Write every ZipMember into the archive. Returns False if cancelled."""
+		pending = deque()
+		maxInflight = self.maxWorkers * INFLIGHT_PER_WORKER
+		executor = ThreadPoolExecutor(max_workers=self.maxWorkers, thread_name_prefix="xPlorerZip")
+		self._reuseFile = open(self.reuseArchive, "rb") if self.reuseArchive else None
+		try:
+			output = SplitVolumeFile(self.zipPath, self.volumeSize) if self.volumeSize else None
+			with ZipWriter(self.zipPath, output) as writer:
+				for member in members:
+					if self._cancelled():
+						return False
+					if member.reuse is not None or member.size >= STREAM_THRESHOLD:
+						pending.append((member, None))
+					else:
+						pending.append((member, executor.submit(compressMember, member.path, self.level, self.storeIncompressible, self.isCancelled)))
+					while len(pending) > maxInflight:
+						if not self._writeNext(writer, pending):
+							return False
+				while pending:
+					if self._cancelled() or not self._writeNext(writer, pending):
+						return False
+			return True
+		finally:
+			for _member, future in pending:
+				if future and not future.cancel():
+					self._discard(future)
+			executor.shutdown(wait=True)
+			if self._reuseFile:
+				self._reuseFile.close()
+
+	def _discard(self, future):
+		try:
+			compressed = future.result()
+			if compressed:
+				compressed.data.close()
+		except Exception:
+			pass
+
+	def _writeNext(self, writer, pending):
+		"""Append the oldest pending member. Returns False if cancelled."""
+		member, future = pending.popleft()
+		if member.reuse is not None:
+			return self._copyMember(writer, member)
+		if future is None:
+			return self._streamMember(writer, member)
+		compressed = future.result()
+		if compressed is None:
+			return False
+		try:
+			writer.addMember(member.arcname, compressed.mtime, compressed.method, compressed.crc, compressed.compressedSize, compressed.fileSize, compressed.data)
+		finally:
+			compressed.data.close()
+		self._advance(compressed.fileSize)
+		return True
+
+	def _copyMember(self, writer, member):
+		info = member.reuse
+		source = self._reuseFile
+		source.seek(info.header_offset)
+		header = source.read(LOCAL_HEADER_SIZE)
+		if len(header) < LOCAL_HEADER_SIZE or header[:4] != b"PK\x03\x04":
+			raise zipfile.BadZipFile(f"Bad local header for {info.filename}")
+		nameLength, extraLength = struct.unpack("<2H", header[26:30])
+		source.seek(info.header_offset + LOCAL_HEADER_SIZE + nameLength + extraLength)
+		mtime = time.mktime(info.date_time + (0, 0, -1))
+		writer.addMember(member.arcname, mtime, info.compress_type, info.CRC, info.compress_size, info.file_size, source)
+		self._advance(info.file_size)
+		return not self._cancelled()
+
+	def _streamMember(self, writer, member):
+		buffer = bytearray(STREAM_CHUNK_SIZE)
+		view = memoryview(buffer)
+		crc = 0
+		fileSize = 0
+		compressedSize = 0
+		with open(member.path, "rb", buffering=0) as f:
+			length = f.readinto(buffer)
+			method = chooseMethod(member.path, member.size, view[:length]) if self.storeIncompressible else zipfile.ZIP_DEFLATED
+			compressor = _openCompressor(method, self.level)
+			writer.beginMember(member.arcname, os.fstat(f.fileno()).st_mtime, method, member.size)
+			while length:
+				chunk = view[:length]
+				crc = zlib.crc32(chunk, crc)
+				fileSize += length
+				data = compressor.compress(chunk) if compressor else chunk
+				compressedSize += len(data)
+				writer.write(data)
+				self._advance(length)
+				if self._cancelled():
+					return False
+				length = f.readinto(buffer)
+			if compressor:
+				data = compressor.flush()
+				compressedSize += len(data)
+				writer.write(data)
+		writer.endMember(crc, compressedSize, fileSize)
+		return True
+
+	def _advance(self, size):
+		self.bytesDone += size
+		if self.onProgress:
+			self.onProgress(self.bytesDone)
@@ -16,8 +16,13 @@ import addonHandler
 import core
 import tones
 import comtypes.client
+import tempfile
 from urllib.parse import unquote
 from logHandler import log
+from .config import loadConfig
+from .exclusionRules import ExclusionRules
+from .gitIgnore import GitIgnoreRules
+from .treeWalker import walkTree, ruleScanner
 
 addonHandler.initTranslation()
 
@@ -157,7 +162,29 @@ class RobocopyManager:
 			log.debug(f"Robocopy: drive type check failed: {e}")
 			return False
 
-	def _buildRobocopyCommand(self, source, dest, isDir, isMove, useMultiThread):
+	def _writeGitIgnoreJob(self, source, isCancelled):
+		"""Write a robocopy job file excluding what .gitignore files ignore below source.
+
+		Robocopy cannot read .gitignore, so the tree is walked once, without entering
+		ignored folders, and the ignored paths are passed as full-path /XD and /XF
+		entries. A job file is used because a large repository easily exceeds the
+		command line length limit. Returns None when nothing is ignored.
+		"""
+		rules = GitIgnoreRules(collectIgnored=True)
+		for _scan in walkTree(source, scanner=ruleScanner(rules), isCancelled=isCancelled):
+			pass
+		if not (rules.ignoredDirs or rules.ignoredFiles):
+			return None
+		fd, jobPath = tempfile.mkstemp(prefix="xplorer_", suffix=".rcj")
+		with os.fdopen(fd, "w", encoding="utf-16") as f:
+			for switch, paths in (("/XD", rules.ignoredDirs), ("/XF", rules.ignoredFiles)):
+				if paths:
+					f.write(switch + "\n")
+					for path in paths:
+						f.write("\t" + path + "\n")
+		return jobPath
+
+	def _buildRobocopyCommand(self, source, dest, isDir, isMove, useMultiThread, jobFile=None):
 		if isDir:
 			sourceName = os.path.basename(source)
 			targetDest = os.path.join(dest, sourceName)
@@ -170,10 +197,13 @@ class RobocopyManager:
 		cmd += ["/R:5", "/W:5", "/J", "/V", "/NP"]
 		if isDir:
 			cmd.append("/XJ")
+			cmd += ExclusionRules.fromConfig(loadConfig()).robocopySwitches()
 		if useMultiThread:
 			cmd.append("/MT:8")
 		if isMove:
 			cmd.append("/MOVE")
+		if jobFile:
+			cmd.append("/JOB:" + jobFile)
 		return cmd
 
 	def _startStdoutReader(self, process):
@@ -219,6 +249,7 @@ class RobocopyManager:
 		time.sleep(0.3)
 
 		useMultiThread = not self._isRemovableDrive(dest)
+		respectGitignore = loadConfig().get("respectGitignore", False)
 		totalFiles = len(sources)
 		failedItems = []
 		succeededCount = 0
@@ -231,9 +262,16 @@ class RobocopyManager:
 			source_name = os.path.basename(source)
 			is_dir = os.path.isdir(source)
 			target_dest = os.path.join(dest, source_name)
-			cmd = self._buildRobocopyCommand(source, dest, is_dir, is_move, useMultiThread)
+			jobFile = None
 
 			try:
+				if is_dir and respectGitignore:
+					wx.CallAfter(dlg.update_progress, int((idx / totalFiles) * 100), f"Checking .gitignore files: {source_name}")
+					jobFile = self._writeGitIgnoreJob(source, lambda: bool(dlg and dlg.is_cancelled))
+					if dlg and dlg.is_cancelled:
+						wasCancelled = True
+						break
+				cmd = self._buildRobocopyCommand(source, dest, is_dir, is_move, useMultiThread, jobFile)
 				startupinfo = subprocess.STARTUPINFO()
 				startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
 				self.active_process = subprocess.Popen(
@@ -309,6 +347,12 @@ class RobocopyManager:
 				log.exception(f"Robocopy error for {source_name}: {e}")
 				failedItems.append(source_name)
 				continue
+			finally:
+				if jobFile:
+					try:
+						os.remove(jobFile)
+					except OSError:
+						pass
 
 		def cleanup_dlg():
 			if dlg:
@@ -0,0 +1,231 @@
+# sizeIndex.py
+
+import os
+import json
+import threading
+import time
+from collections import namedtuple
+from logHandler import log
+from .config import CONFIG_DIR, loadConfig
+from .treeWalker import scanDirectory, walkTree
+from .exclusionRules import ExclusionRules, NO_EXCLUSIONS
+
+INDEX_FILE = os.path.join(CONFIG_DIR, "xplorer_sizeindex.json")
+INDEX_VERSION = 1
+# Past this many directories the index only keeps what was used in this session,
+# so the file on disk cannot grow without bound across years of browsing.
+MAX_INDEX_ENTRIES = 500000
+# Last complete totals of measured folders, used to estimate how long a rescan will take
+MAX_ROOT_TOTALS = 1000
+PROGRESS_INTERVAL = 0.5
+# Measures finishing within this many seconds of each other are saved together
+SAVE_DELAY = 2.0
+
+# Entry layout: [directory mtime_ns, bytes of direct files, direct file count, [subdirectory names]]
+_MTIME, _BYTES, _FILES, _SUBDIRS = range(4)
+
+# What the index hands to walkTree for one directory, instead of a full DirectoryScan
+IndexedDirectory = namedtuple("IndexedDirectory", ("path", "depth", "totalBytes", "fileCount", "subdirs"))
+
+
+class SizeIndex:
+	"""Persistent per-directory size aggregates keyed by normalised path.
+
+	Each directory stores only the totals of its own files plus the names of its
+	subdirectories, together with the directory mtime it was scanned at. A query
+	still visits every directory of the tree, but only with a single stat; only
+	directories whose mtime changed (an entry was added, removed or renamed) are
+	listed again. Note that rewriting a file in place does not touch the mtime of
+	its directory, so such a change is only picked up once the directory changes.
+	Entries are only valid for the exclusion rules they were built with, so the
+	index starts over whenever the rules change.
+	"""
+
+	def __init__(self, indexFile=INDEX_FILE):
+		self._indexFile = indexFile
+		self._lock = threading.Lock()
+		# Held while the file is written, so writes happen in the order their copies were taken
+		self._saveLock = threading.Lock()
+		self._saveTimer = None
+		self._entries = None
+		self._roots = {}
+		self._touched = set()
+		self._dirty = False
+		self._rules = NO_EXCLUSIONS
+		self._rulesSignature = NO_EXCLUSIONS.signature()
+
+	def _key(self, path):
+		return os.path.normcase(os.path.normpath(path))
+
+	def _load(self):
+		"""Read the index file once, then apply the configured rules. Called with the lock held.
+
+		The rules in use must always be the ones the entries were built with, so a
+		lookup() before the first measure() never lists folders with other rules.
+		"""
+		if self._entries is not None:
+			return
+		self._entries = {}
+		if os.path.exists(self._indexFile):
+			try:
+				with open(self._indexFile, "r", encoding="utf-8") as f:
+					data = json.load(f)
+				if data.get("version") == INDEX_VERSION:
+					self._entries = data.get("entries", {})
+					self._roots = data.get("roots", {})
+					self._rulesSignature = data.get("rules", "")
+			except Exception as e:
+				log.error(f"Error loading size index: {e}")
+		self._applyRules(ExclusionRules.fromConfig(loadConfig()))
+
+	def _applyRules(self, rules):
+		"""Use rules, dropping entries built with other rules. Called with the lock held."""
+		self._rules = rules
+		signature = rules.signature()
+		if signature != self._rulesSignature:
+			self._entries = {}
+			self._roots = {}
+			self._rulesSignature = signature
+			self._dirty = True
+
+	def save(self):
+		"""Write the index now if it changed.
+
+		Only copying the entries holds the lock; serialising half a million of them
+		takes over a second, and lookups and walks carry on meanwhile.
+		"""
+		with self._saveLock:
+			with self._lock:
+				if not self._dirty or self._entries is None:
+					return
+				if len(self._entries) > MAX_INDEX_ENTRIES:
+					self._entries = {k: v for k, v in self._entries.items() if k in self._touched}
+				# Entries are replaced, never changed in place, so a shallow copy is a snapshot
+				data = {"version": INDEX_VERSION, "rules": self._rulesSignature, "entries": dict(self._entries), "roots": dict(self._roots)}
+				self._dirty = False
+			try:
+				os.makedirs(os.path.dirname(self._indexFile), exist_ok=True)
+				tempFile = self._indexFile + ".tmp"
+				with open(tempFile, "w", encoding="utf-8") as f:
+					json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+				os.replace(tempFile, self._indexFile)
+			except Exception as e:
+				log.error(f"Error saving size index: {e}")
+				with self._lock:
+					self._dirty = True
+
+	def scheduleSave(self):
+		"""Save SAVE_DELAY seconds from now, so the measures of one command are written once."""
+		with self._lock:
+			if self._saveTimer:
+				self._saveTimer.cancel()
+			self._saveTimer = threading.Timer(SAVE_DELAY, self._savePending)
+			self._saveTimer.daemon = True
+			self._saveTimer.start()
+
+	def _savePending(self):
+		with self._lock:
+			self._saveTimer = None
+		self.save()
+
+	def clear(self):
+		with self._lock:
+			self._entries = {}
+			self._roots = {}
+			self._touched.clear()
+			self._dirty = True
+		self.save()
+
+	def refreshRules(self, rules=None):
+		"""Apply the configured exclusion rules, dropping entries built with other rules."""
+		if rules is None:
+			rules = ExclusionRules.fromConfig(loadConfig())
+		with self._lock:
+			self._load()
+			self._applyRules(rules)
+
+	def _scanIndexed(self, path, depth):
+		"""walkTree scanner: answer from the index, listing path again only if its mtime changed."""
+		mtimeNs = os.stat(path).st_mtime_ns
+		key = self._key(path)
+		with self._lock:
+			entry = self._entries.get(key)
+			self._touched.add(key)
+		if entry is None or entry[_MTIME] != mtimeNs:
+			scan = scanDirectory(path, depth, self._rules)
+			entry = [
+				mtimeNs,
+				sum(f.stat().st_size for f in scan.files),
+				len(scan.files),
+				[os.path.basename(p) for p in scan.subdirs],
+			]
+			with self._lock:
+				self._entries[key] = entry
+				self._dirty = True
+		subdirs = [os.path.join(path, name) for name in entry[_SUBDIRS]]
+		return IndexedDirectory(path, depth, entry[_BYTES], entry[_FILES], subdirs)
+
+	def lookup(self, path):
+		"""Return the IndexedDirectory of a single directory, listing it only if needed."""
+		with self._lock:
+			self._load()
+		return self._scanIndexed(path, 0)
+
+	def lastTotals(self, folderPath):
+		"""Return (totalBytes, fileCount, subfolderCount) of the last complete measure of folderPath, or None."""
+		with self._lock:
+			self._load()
+			totals = self._roots.get(self._key(folderPath))
+		return tuple(totals) if totals else None
+
+	def measure(self, folderPath, isCancelled=None, onProgress=None, progressInterval=PROGRESS_INTERVAL):
+		"""Return (totalBytes, fileCount, subfolderCount) for folderPath, or None if cancelled.
+
+		While the walk runs, onProgress(totalBytes, fileCount, subfolderCount) receives
+		the partial totals at most once per progressInterval seconds.
+		Directories that cannot be read are skipped, the same way os.walk skips them.
+		"""
+		self.refreshRules()
+		totalBytes = 0
+		fileCount = 0
+		subfolderCount = 0
+		lastProgressTime = time.monotonic()
+		for indexed in walkTree(folderPath, scanner=self._scanIndexed, isCancelled=isCancelled):
+			totalBytes += indexed.totalBytes
+			fileCount += indexed.fileCount
+			subfolderCount += len(indexed.subdirs)
+			if onProgress:
+				now = time.monotonic()
+				if now - lastProgressTime >= progressInterval:
+					lastProgressTime = now
+					onProgress(totalBytes, fileCount, subfolderCount)
+		if isCancelled and isCancelled():
+			return None
+		self.rememberTotals(folderPath, (totalBytes, fileCount, subfolderCount))
+		self.scheduleSave()
+		return totalBytes, fileCount, subfolderCount
+
+	def rememberTotals(self, folderPath, totals):
+		"""Record the complete (totalBytes, fileCount, subfolderCount) of folderPath for lastTotals."""
+		with self._lock:
+			self._load()
+			key = self._key(folderPath)
+			totals = list(totals)
+			if self._roots.get(key) != totals:
+				self._roots.pop(key, None)
+				self._roots[key] = totals
+				while len(self._roots) > MAX_ROOT_TOTALS:
+					del self._roots[next(iter(self._roots))]
+				self._dirty = True
+
+
+_sizeIndex = None
+_sizeIndexLock = threading.Lock()
+
+def getSizeIndex():
+	"""Return the size index shared by every feature of the add-on."""
+	global _sizeIndex
+	with _sizeIndexLock:
+		if _sizeIndex is None:
+			_sizeIndex = SizeIndex()
+		return _sizeIndex
@@ -0,0 +1,96 @@
+# sizePrewarmer.py
+
+import os
+import time
+import ctypes
+import threading
+from logHandler import log
+from .sizeIndex import getSizeIndex
+
+THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+# Pause after every directory listed, so pre-warming never competes with real work for the disk
+DIRECTORY_DELAY = 0.005
+# Pause between two children of the entered folder
+CHILD_DELAY = 0.1
+
+
+class SizePrewarmer:
+	"""Fills the size index for the children of the folder open in Explorer.
+
+	Runs a single background thread at background CPU and I/O priority, lists one
+	directory at a time and stops as soon as another folder is entered.
+	"""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._current_path = None
+		self._cancel_event = None
+
+	def cleanup(self):
+		self.stop()
+
+	def stop(self):
+		with self._lock:
+			if self._cancel_event:
+				self._cancel_event.set()
+			self._cancel_event = None
+			self._current_path = None
+
+	def folder_entered(self, path):
+		with self._lock:
+			if path == self._current_path:
+				return
+			if self._cancel_event:
+				self._cancel_event.set()
+			self._current_path = path
+			self._cancel_event = threading.Event()
+			cancel_event = self._cancel_event
+		threading.Thread(target=self._prewarm, args=(path, cancel_event), daemon=True).start()
+
+	def _enter_background_mode(self):
+		try:
+			kernel32 = ctypes.windll.kernel32
+			kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN)
+		except (AttributeError, OSError) as e:
+			log.debug(f"Size pre-warming runs at normal priority: {e}")
+
+	def _prewarm(self, folder_path, cancel_event):
+		self._enter_background_mode()
+		index = getSizeIndex()
+		index.refreshRules()
+		try:
+			with os.scandir(folder_path) as it:
+				children = [entry.path for entry in it if entry.is_dir(follow_symlinks=False)]
+		except OSError as e:
+			log.debug(f"Size pre-warming cannot list {folder_path}: {e}")
+			return
+		try:
+			for child in children:
+				if cancel_event.is_set():
+					return
+				totals = self._measure_child(index, child, cancel_event)
+				if totals is not None:
+					index.rememberTotals(child, totals)
+				time.sleep(CHILD_DELAY)
+		finally:
+			index.save()
+
+	def _measure_child(self, index, child_path, cancel_event):
+		total_bytes = 0
+		file_count = 0
+		subfolder_count = 0
+		stack = [child_path]
+		while stack:
+			if cancel_event.is_set():
+				return None
+			path = stack.pop()
+			try:
+				indexed = index.lookup(path)
+			except OSError:
+				continue
+			total_bytes += indexed.totalBytes
+			file_count += indexed.fileCount
+			subfolder_count += len(indexed.subdirs)
+			stack.extend(indexed.subdirs)
+			time.sleep(DIRECTORY_DELAY)
+		return total_bytes, file_count, subfolder_count
@@ -0,0 +1,114 @@
+# splitVolumes.py
+
+import os
+
+MB = 1024 * 1024
+
+
+def volumePath(basePath, index):
+	"""Path of volume index (from 0) of a split archive, named like 7-Zip's: name.zip.001, name.zip.002..."""
+	return f"{basePath}.{index + 1:03d}"
+
+
+def existingVolumes(basePath):
+	"""Paths of the volumes of basePath that exist, in order."""
+	volumes = []
+	while os.path.exists(volumePath(basePath, len(volumes))):
+		volumes.append(volumePath(basePath, len(volumes)))
+	return volumes
+
+
+def removeVolumes(basePath):
+	for path in existingVolumes(basePath):
+		try:
+			os.remove(path)
+		except OSError:
+			pass
+
+
+class SplitVolumeFile:
+	"""A write-only file that lays its bytes out over volumes of volumeSize bytes.
+
+	Volumes are created as the data reaches them, so a split archive is written
+	once, with no full size copy to split afterwards. The volumes joined together
+	are the archive, which is how 7-Zip's -v switch splits too, so 7-Zip opens
+	either. Seeking back to patch bytes already written, as ZipWriter does for
+	local headers, reopens the earlier volume in place.
+	"""
+
+	def __init__(self, basePath, volumeSize):
+		if volumeSize <= 0:
+			raise ValueError("volumeSize must be positive")
+		self.name = basePath
+		self.basePath = basePath
+		self.volumeSize = volumeSize
+		self.closed = False
+		self._position = 0
+		self._volumeCount = 0
+		# The volume written to last, kept open because writes are almost always sequential
+		self._index = None
+		self._file = None
+
+	def _select(self, index):
+		if index == self._index:
+			return self._file
+		if self._file:
+			self._file.close()
+		if index < self._volumeCount:
+			self._file = open(volumePath(self.basePath, index), "r+b")
+		else:
+			self._file = open(volumePath(self.basePath, index), "wb")
+			self._volumeCount = index + 1
+		self._index = index
+		return self._file
+
+	def write(self, data):
+		view = memoryview(data).cast("B")
+		written = 0
+		while written < len(view):
+			index, offset = divmod(self._position, self.volumeSize)
+			f = self._select(index)
+			f.seek(offset)
+			length = min(len(view) - written, self.volumeSize - offset)
+			f.write(view[written:written + length])
+			written += length
+			self._position += length
+		return written
+
+	def tell(self):
+		return self._position
+
+	def seek(self, offset, whence=os.SEEK_SET):
+		if whence == os.SEEK_CUR:
+			offset += self._position
+		elif whence == os.SEEK_END:
+			raise OSError("SplitVolumeFile cannot seek from its end")
+		self._position = offset
+		return self._position
+
+	def seekable(self):
+		return True
+
+	def writable(self):
+		return True
+
+	def flush(self):
+		if self._file:
+			self._file.flush()
+
+	def close(self):
+		if self._file:
+			self._file.close()
+			self._file = None
+			self._index = None
+		self.closed = True
+
+	@property
+	def volumeCount(self):
+		return self._volumeCount
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		self.close()
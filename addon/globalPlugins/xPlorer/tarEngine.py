@@ -0,0 +1,133 @@
+# tarEngine.py
+
+import os
+import tarfile
+from logHandler import log
+from .archiveFormats import FORMAT_TAR_XZ
+from .splitVolumes import SplitVolumeFile
+from .parallelUnzip import safeMemberPath, freePath
+from .archivePool import READ_CHUNK_SIZE
+
+
+class _Cancelled(Exception):
+	pass
+
+
+class _ProgressReader:
+	"""File wrapper that reports every read, so a large member moves the progress as it streams."""
+
+	def __init__(self, fileobj, onRead):
+		self._fileobj = fileobj
+		self._onRead = onRead
+
+	def read(self, size=-1):
+		data = self._fileobj.read(size)
+		self._onRead(len(data))
+		return data
+
+
+class TarEngine:
+	"""Writes a .tar.gz or .tar.xz archive, streaming every member straight into the compressor.
+
+	Nothing is staged in temporary files: tarfile copies each file in blocks into
+	the gzip or xz stream, and progress and cancellation are handled per block.
+	level is the gzip compresslevel or the xz preset. With volumeSize, the
+	compressed stream is written straight into volumes of that many bytes.
+	"""
+
+	def __init__(self, tarPath, archiveFormat, level, isCancelled=None, onProgress=None, volumeSize=0):
+		self.tarPath = tarPath
+		self.volumeSize = volumeSize
+		self.archiveFormat = archiveFormat
+		self.level = level
+		self.isCancelled = isCancelled
+		# onProgress(bytes of source files written so far)
+		self.onProgress = onProgress
+		self.bytesDone = 0
+
+	def _cancelled(self):
+		return bool(self.isCancelled and self.isCancelled())
+
+	def _advance(self, size):
+		self.bytesDone += size
+		if self.onProgress:
+			self.onProgress(self.bytesDone)
+		if self._cancelled():
+			raise _Cancelled()
+
+	def _open(self, output):
+		if self.archiveFormat == FORMAT_TAR_XZ:
+			return tarfile.open(self.tarPath, "w:xz", fileobj=output, preset=self.level)
+		return tarfile.open(self.tarPath, "w:gz", fileobj=output, compresslevel=self.level)
+
+	def run(self, members):
+		"""Write every ZipMember-like (path, arcname, size) member. Returns False if cancelled."""
+		output = SplitVolumeFile(self.tarPath, self.volumeSize) if self.volumeSize else None
+		try:
+			with self._open(output) as archive:
+				for member in members:
+					if self._cancelled():
+						return False
+					info = archive.gettarinfo(member.path, member.arcname)
+					with open(member.path, "rb") as f:
+						archive.addfile(info, _ProgressReader(f, self._advance))
+			return True
+		except _Cancelled:
+			return False
+		finally:
+			if output:
+				output.close()
+
+
+class TarExtractor:
+	"""Extracts a .tar, .tar.gz, .tar.bz2 or .tar.xz archive in one streaming pass.
+
+	Members are written as the decompressed stream reaches them, so the inner
+	.tar is never written out. Names are cleaned by safeMemberPath like those of
+	zip members, existing files are never overwritten, and links and devices are
+	skipped. Progress is counted in bytes of the archive file read.
+	"""
+
+	def __init__(self, tarPath, destination, isCancelled=None, onProgress=None):
+		self.tarPath = tarPath
+		self.destination = destination
+		self.isCancelled = isCancelled
+		# onProgress(archive bytes read, archive size)
+		self.onProgress = onProgress
+
+	def _cancelled(self):
+		return bool(self.isCancelled and self.isCancelled())
+
+	def run(self):
+		"""Extract every file and folder. Returns False if cancelled."""
+		totalBytes = os.path.getsize(self.tarPath)
+		os.makedirs(self.destination, exist_ok=True)
+		with open(self.tarPath, "rb") as raw, tarfile.open(fileobj=raw, mode="r|*") as archive:
+			for info in archive:
+				if self._cancelled():
+					return False
+				target = safeMemberPath(self.destination, info.name)
+				if target is None:
+					continue
+				if info.isdir():
+					os.makedirs(target, exist_ok=True)
+					continue
+				if not info.isfile():
+					log.debug(f"Skipping {info.name} of {self.tarPath}, not a regular file")
+					continue
+				os.makedirs(os.path.dirname(target), exist_ok=True)
+				target = freePath(target)
+				source = archive.extractfile(info)
+				with open(target, "xb") as output:
+					while not self._cancelled():
+						chunk = source.read(READ_CHUNK_SIZE)
+						if not chunk:
+							break
+						output.write(chunk)
+						if self.onProgress:
+							self.onProgress(raw.tell(), totalBytes)
+				if self._cancelled():
+					os.remove(target)
+					return False
+				os.utime(target, (info.mtime, info.mtime))
+		return True
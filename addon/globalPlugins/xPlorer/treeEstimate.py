@@ -0,0 +1,80 @@
+# treeEstimate.py
+
+import math
+import random
+import time
+from collections import namedtuple
+
+# Below this many probes the spread of the samples says little about the error
+MIN_PROBES = 10
+
+# subfolderCount excludes the root itself; relativeError is the half width of a
+# 95% confidence interval as a fraction of the estimate, the largest of those of
+# the three totals, or None when unknown
+TreeEstimate = namedtuple("TreeEstimate", ("totalBytes", "fileCount", "subfolderCount", "relativeError", "probes"))
+
+
+def estimateTree(rootPath, lookup, deadline, isCancelled=None, rng=None):
+	"""Estimate the totals of a tree by random root-to-leaf probes until deadline (time.monotonic()).
+
+	Knuth's estimator: along a random path every directory counts as many times as
+	the product of the branching factors above it. The mean over probes is an
+	unbiased estimate of the whole tree, and the spread of the probes gives its error.
+	Bytes and files per folder vary far more than folder counts, so each total
+	gets its own error and the estimate reports the largest.
+	lookup(path) must return an object with totalBytes, fileCount and subdirs, such
+	as SizeIndex.lookup, which also means every probe warms the size index.
+	Returns None if no probe could be completed.
+	"""
+	rng = rng or random.Random()
+	samples = []
+	while time.monotonic() < deadline:
+		if isCancelled and isCancelled():
+			return None
+		sample = _probe(rootPath, lookup, rng)
+		if sample is None:
+			break
+		samples.append(sample)
+	if not samples:
+		return None
+	count = len(samples)
+	means = [sum(column) / count for column in zip(*samples)]
+	totalBytes, fileCount, dirCount = means
+	relativeError = None
+	if count >= MIN_PROBES:
+		errors = [
+			_relativeError([sample[column] for sample in samples], mean)
+			for column, mean in enumerate(means)
+			if mean > 0
+		]
+		relativeError = max(errors, default=None)
+	return TreeEstimate(int(totalBytes), int(round(fileCount)), max(0, int(round(dirCount)) - 1), relativeError, count)
+
+
+def _relativeError(values, mean):
+	"""Half width of the 95% confidence interval of the mean of values, as a fraction of mean."""
+	variance = sum((value - mean) ** 2 for value in values) / (len(values) - 1)
+	return 1.96 * math.sqrt(variance / len(values)) / mean
+
+
+def _probe(rootPath, lookup, rng):
+	totalBytes = 0
+	fileCount = 0
+	dirCount = 0
+	weight = 1
+	path = rootPath
+	while True:
+		try:
+			node = lookup(path)
+		except OSError:
+			if path == rootPath:
+				return None
+			break
+		totalBytes += weight * node.totalBytes
+		fileCount += weight * node.fileCount
+		dirCount += weight
+		if not node.subdirs:
+			break
+		weight *= len(node.subdirs)
+		path = rng.choice(node.subdirs)
+	return totalBytes, fileCount, dirCount
@@ -0,0 +1,89 @@
+# treeWalker.py
+
+import os
+import functools
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from logHandler import log
+
+# Directory listing is I/O bound and os.scandir releases the GIL, so a handful of
+# threads keeps network shares and NVMe queues busy without starving NVDA.
+DEFAULT_MAX_WORKERS = 8
+POLL_INTERVAL = 0.2
+
+# files: DirEntry objects of regular files, with their stat data already cached
+# subdirs: full paths of subdirectories to descend into
+DirectoryScan = namedtuple("DirectoryScan", ("path", "depth", "files", "subdirs"))
+
+
+def scanDirectory(path, depth, rules=None):
+	"""List a single directory for walkTree.
+
+	Runs on a worker thread. entry.stat() is called here so that consumers reuse the
+	cached result instead of issuing another syscall per file (on Windows the data
+	already comes from the directory listing itself). Folders excluded by rules are
+	left out of subdirs, so the walk never descends into them.
+	"""
+	files = []
+	subdirs = []
+	with os.scandir(path) as it:
+		for entry in it:
+			try:
+				if entry.is_dir(follow_symlinks=False):
+					if not (rules and rules.excludesDirectory(entry)):
+						subdirs.append(entry.path)
+				elif entry.is_file():
+					entry.stat()
+					if not (rules and rules.excludesFile(entry)):
+						files.append(entry)
+			except OSError:
+				pass
+	return DirectoryScan(path, depth, files, subdirs)
+
+
+def ruleScanner(rules):
+	"""A walkTree scanner applying ExclusionRules, or the plain scanner when there are none."""
+	if not rules:
+		return scanDirectory
+	return functools.partial(scanDirectory, rules=rules)
+
+
+def _logScanError(path, error):
+	log.debug(f"Cannot list {path}: {error}")
+
+
+def walkTree(rootPath, scanner=scanDirectory, maxWorkers=DEFAULT_MAX_WORKERS, isCancelled=None, onError=_logScanError):
+	"""Yield the scan of rootPath and of every directory below it.
+
+	Directories are listed concurrently on a bounded thread pool and yielded in the
+	order they finish, so consumers must not rely on a top-down order; the depth of
+	each directory is carried on its scan instead. scanner(path, depth) may be
+	replaced by any callable returning an object with a subdirs sequence of paths.
+	A directory that cannot be listed is reported to onError(path, error) and
+	skipped. The walk stops quietly once isCancelled() returns True, so callers
+	should check it again after the loop.
+	"""
+	executor = ThreadPoolExecutor(max_workers=maxWorkers, thread_name_prefix="xPlorerWalker")
+	pending = {executor.submit(scanner, rootPath, 0): rootPath}
+	try:
+		while pending:
+			if isCancelled and isCancelled():
+				return
+			done, _ignore = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+			for future in done:
+				if isCancelled and isCancelled():
+					return
+				path = pending.pop(future)
+				error = future.exception()
+				if error is not None:
+					if onError:
+						onError(path, error)
+					continue
+				scan = future.result()
+				for subdir in scan.subdirs:
+					pending[executor.submit(scanner, subdir, scan.depth + 1)] = subdir
+				yield scan
+	finally:
+		for future in pending:
+			future.cancel()
+		executor.shutdown(wait=False)
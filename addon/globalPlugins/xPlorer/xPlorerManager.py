@@ -52,6 +52,59 @@ class EmptyFolderStaticText(NVDAObject):
 # ----------------------------------------------------------------------
 # Settings panel
 # ----------------------------------------------------------------------
+SIZE_ACCOUNTING_CHOICES = [
+	("logical", "Logical size of every file"),
+	("onDisk", "Size on disk, counting hardlinks once (slower)"),
+]
+
+ARCHIVE_FORMAT_CHOICES = [
+	("zip", "zip"),
+	("7z", "7z (needs 7-Zip)"),
+	("tar.gz", "tar.gz"),
+	("tar.xz", "tar.xz"),
+]
+
+COMPRESSION_PRESET_CHOICES = [
+	("fastest", "Fastest"),
+	("balanced", "Balanced"),
+	("smallest", "Smallest"),
+]
+
+STAGE_ARCHIVES_CHOICES = [
+	("never", "Never"),
+	("network", "For network destinations"),
+	("always", "Always"),
+]
+
+ENGINE_PROFILE_CHOICES = [
+	("standard", "Standard"),
+	("background", "Background, at below normal priority"),
+	("custom", "Custom"),
+]
+
+CUSTOM_LEVEL_CHOICES = [(-1, "Use the compression level setting")] + [(level, str(level)) for level in range(10)]
+
+CUSTOM_METHOD_CHOICES = [
+	("", "7-Zip default"),
+	("Deflate", "Deflate"),
+	("Deflate64", "Deflate64"),
+	("BZip2", "BZip2"),
+	("LZMA", "LZMA"),
+	("PPMd", "PPMd"),
+]
+
+CUSTOM_PRIORITY_CHOICES = [
+	("idle", "Idle"),
+	("belowNormal", "Below normal"),
+	("normal", "Normal"),
+]
+
+def _choiceIndex(choices, value):
+	for index, (key, label) in enumerate(choices):
+		if key == value:
+			return index
+	return 0
+
 class xPlorerSettingsPanel(SettingsPanel):
 	title = "xPlorer"
 	def makeSettings(self, settingsSizer):
@@ -67,14 +120,79 @@ class xPlorerSettingsPanel(SettingsPanel):
 		self.sayFileExplorer.SetValue(conf["sayFileExplorer"])
 		self.autoPasteClipboardToRename = sHelper.addItem(wx.CheckBox(self, label="Automatically paste clipboard content into rename field"))
 		self.autoPasteClipboardToRename.SetValue(conf.get("autoPasteClipboardToRename", True))
+		self.sizeAccounting = sHelper.addLabeledControl("Say Size accounting:", wx.Choice, choices=[label for key, label in SIZE_ACCOUNTING_CHOICES])
+		self.sizeAccounting.SetSelection(_choiceIndex(SIZE_ACCOUNTING_CHOICES, conf.get("sizeAccounting", "logical")))
+		self.prewarmFolderSizes = sHelper.addItem(wx.CheckBox(self, label="Calculate folder sizes in the background when entering a folder"))
+		self.prewarmFolderSizes.SetValue(conf.get("prewarmFolderSizes", False))
+		self.folderInfoTimeBudget = sHelper.addLabeledControl("Seconds before Folder info speaks an estimate (0 waits for the exact count):", wx.SpinCtrl, min=0, max=600, initial=conf.get("folderInfoTimeBudget", 5))
+		self.exclusionPatterns = sHelper.addLabeledControl("Exclude these names from sizes, compression and copies (separate with ;, end with / for folders only):", wx.TextCtrl, value=conf.get("exclusionPatterns", ""))
+		self.excludeHidden = sHelper.addItem(wx.CheckBox(self, label="Exclude hidden files and folders"))
+		self.excludeHidden.SetValue(conf.get("excludeHidden", False))
+		self.excludeSystem = sHelper.addItem(wx.CheckBox(self, label="Exclude system files and folders"))
+		self.excludeSystem.SetValue(conf.get("excludeSystem", False))
+		self.excludeFilesLargerThanMB = sHelper.addLabeledControl("Exclude files larger than this many MB (0 keeps all sizes):", wx.SpinCtrl, min=0, max=10000000, initial=conf.get("excludeFilesLargerThanMB", 0))
+		self.respectGitignore = sHelper.addItem(wx.CheckBox(self, label="Skip items ignored by .gitignore files when compressing or copying folders"))
+		self.respectGitignore.SetValue(conf.get("respectGitignore", False))
+		self.storeIncompressible = sHelper.addItem(wx.CheckBox(self, label="Store already compressed files such as photos, videos and archives without recompressing them"))
+		self.storeIncompressible.SetValue(conf.get("storeIncompressible", True))
+		self.sevenZipStorePass = sHelper.addItem(wx.CheckBox(self, label="With 7-Zip, store photos, videos and archives in a second run (lists the folders first and rewrites the archive)"))
+		self.sevenZipStorePass.SetValue(conf.get("sevenZipStorePass", False))
+		self.announceCompressionEstimate = sHelper.addItem(wx.CheckBox(self, label="Announce the expected archive size and duration when compression starts"))
+		self.announceCompressionEstimate.SetValue(conf.get("announceCompressionEstimate", False))
+		self.archiveFormat = sHelper.addLabeledControl("Compress to archive format:", wx.Choice, choices=[label for key, label in ARCHIVE_FORMAT_CHOICES])
+		self.archiveFormat.SetSelection(_choiceIndex(ARCHIVE_FORMAT_CHOICES, conf.get("archiveFormat", "zip")))
+		self.compressionPreset = sHelper.addLabeledControl("Compression level:", wx.Choice, choices=[label for key, label in COMPRESSION_PRESET_CHOICES])
+		self.compressionPreset.SetSelection(_choiceIndex(COMPRESSION_PRESET_CHOICES, conf.get("compressionPreset", "balanced")))
+		self.splitVolumeMB = sHelper.addLabeledControl("Split new archives into volumes of this many MB (0 makes one file, 4095 fits FAT32):", wx.SpinCtrl, min=0, max=10000000, initial=conf.get("splitVolumeMB", 0))
+		self.stageArchives = sHelper.addLabeledControl("Build archives in a local folder and copy them to their destination when complete:", wx.Choice, choices=[label for key, label in STAGE_ARCHIVES_CHOICES])
+		self.stageArchives.SetSelection(_choiceIndex(STAGE_ARCHIVES_CHOICES, conf.get("stageArchives", "never")))
+		self.stagingFolder = sHelper.addLabeledControl("Local folder for building archives (empty uses the temporary folder):", wx.TextCtrl, value=conf.get("stagingFolder", ""))
+		self.maxCompressionJobs = sHelper.addLabeledControl("Compressions and extractions that run at once:", wx.SpinCtrl, min=1, max=8, initial=conf.get("maxCompressionJobs", 2))
+		self.batchParallelArchives = sHelper.addLabeledControl("Archives made at once by Compress each item separately:", wx.SpinCtrl, min=1, max=16, initial=conf.get("batchParallelArchives", 2))
+		self.sevenZipProfile = sHelper.addLabeledControl("7-Zip engine profile:", wx.Choice, choices=[label for key, label in ENGINE_PROFILE_CHOICES])
+		self.sevenZipProfile.SetSelection(_choiceIndex(ENGINE_PROFILE_CHOICES, conf.get("sevenZipProfile", "standard")))
+		self.customProfileThreads = sHelper.addLabeledControl("Custom profile threads (0 uses every core):", wx.SpinCtrl, min=0, max=256, initial=conf.get("customProfileThreads", 0))
+		self.customProfileLevel = sHelper.addLabeledControl("Custom profile level:", wx.Choice, choices=[label for key, label in CUSTOM_LEVEL_CHOICES])
+		self.customProfileLevel.SetSelection(_choiceIndex(CUSTOM_LEVEL_CHOICES, conf.get("customProfileLevel", -1)))
+		self.customProfileMethod = sHelper.addLabeledControl("Custom profile method:", wx.Choice, choices=[label for key, label in CUSTOM_METHOD_CHOICES])
+		self.customProfileMethod.SetSelection(_choiceIndex(CUSTOM_METHOD_CHOICES, conf.get("customProfileMethod", "")))
+		self.customProfilePriority = sHelper.addLabeledControl("Custom profile priority:", wx.Choice, choices=[label for key, label in CUSTOM_PRIORITY_CHOICES])
+		self.customProfilePriority.SetSelection(_choiceIndex(CUSTOM_PRIORITY_CHOICES, conf.get("customProfilePriority", "normal")))
+		self.compressionStallSeconds = sHelper.addLabeledControl("Stop 7-Zip after this many seconds without any output:", wx.SpinCtrl, min=10, max=3600, initial=conf.get("compressionStallSeconds", 120))
 	def onSave(self):
-		conf = {
+		# Start from the stored config so keys without a control here are kept
+		conf = loadConfig()
+		conf.update({
 			"autoSelectFirstItem": self.autoSelectFirstItem.GetValue(),
 			"announceEmptyFolder": self.announceEmptyFolder.GetValue(),
 			"suppressDirectUIAnnounce": self.suppressDirectUIAnnounce.GetValue(),
 			"sayFileExplorer": self.sayFileExplorer.GetValue(),
 			"autoPasteClipboardToRename": self.autoPasteClipboardToRename.GetValue(),
-		}
+			"sizeAccounting": SIZE_ACCOUNTING_CHOICES[self.sizeAccounting.GetSelection()][0],
+			"folderInfoTimeBudget": self.folderInfoTimeBudget.GetValue(),
+			"prewarmFolderSizes": self.prewarmFolderSizes.GetValue(),
+			"exclusionPatterns": self.exclusionPatterns.GetValue().strip(),
+			"excludeHidden": self.excludeHidden.GetValue(),
+			"excludeSystem": self.excludeSystem.GetValue(),
+			"excludeFilesLargerThanMB": self.excludeFilesLargerThanMB.GetValue(),
+			"respectGitignore": self.respectGitignore.GetValue(),
+			"storeIncompressible": self.storeIncompressible.GetValue(),
+			"sevenZipStorePass": self.sevenZipStorePass.GetValue(),
+			"compressionStallSeconds": self.compressionStallSeconds.GetValue(),
+			"splitVolumeMB": self.splitVolumeMB.GetValue(),
+			"stageArchives": STAGE_ARCHIVES_CHOICES[self.stageArchives.GetSelection()][0],
+			"stagingFolder": self.stagingFolder.GetValue().strip(),
+			"maxCompressionJobs": self.maxCompressionJobs.GetValue(),
+			"sevenZipProfile": ENGINE_PROFILE_CHOICES[self.sevenZipProfile.GetSelection()][0],
+			"customProfileThreads": self.customProfileThreads.GetValue(),
+			"customProfileLevel": CUSTOM_LEVEL_CHOICES[self.customProfileLevel.GetSelection()][0],
+			"customProfileMethod": CUSTOM_METHOD_CHOICES[self.customProfileMethod.GetSelection()][0],
+			"customProfilePriority": CUSTOM_PRIORITY_CHOICES[self.customProfilePriority.GetSelection()][0],
+			"batchParallelArchives": self.batchParallelArchives.GetValue(),
+			"announceCompressionEstimate": self.announceCompressionEstimate.GetValue(),
+			"archiveFormat": ARCHIVE_FORMAT_CHOICES[self.archiveFormat.GetSelection()][0],
+			"compressionPreset": COMPRESSION_PRESET_CHOICES[self.compressionPreset.GetSelection()][0],
+		})
 		saveConfig(conf)
 		if _global_plugin_instance and hasattr(_global_plugin_instance, 'manager'):
 			_global_plugin_instance.manager._update_speech_dict_for_title()
@@ -0,0 +1,166 @@
+# zipWriter.py
+
+import os
+import time
+import struct
+import zipfile
+from collections import namedtuple
+
+# Same conservative limits as zipfile, so every member zipfile would mark as Zip64 is marked here too
+ZIP64_LIMIT = zipfile.ZIP64_LIMIT
+ZIP_FILECOUNT_LIMIT = zipfile.ZIP_FILECOUNT_LIMIT
+VERSION_DEFAULT = 20
+VERSION_ZIP64 = 45
+FLAG_UTF8 = 0x800
+FILE_ATTRIBUTE_ARCHIVE = 0x20
+ZIP64_EXTRA_ID = 0x0001
+COPY_BUFFER_SIZE = 1024 * 1024
+
+LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+CENTRAL_HEADER = struct.Struct("<4s4B4HL2L5H2L")
+END_RECORD = struct.Struct("<4s4H2LH")
+ZIP64_END_RECORD = struct.Struct("<4sQ2H2L4Q")
+ZIP64_END_LOCATOR = struct.Struct("<4sLQL")
+# Offsets of the CRC and size fields inside a local header
+LOCAL_CRC_OFFSET = 14
+
+_Member = namedtuple("_Member", ("name", "flags", "method", "dosTime", "dosDate", "crc", "compressedSize", "fileSize", "offset"))
+
+
+def _dosDateTime(mtime):
+	t = time.localtime(mtime)
+	if t.tm_year < 1980:
+		return 0, (0 << 9) | (1 << 5) | 1
+	return (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2), ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+
+class ZipWriter:
+	"""Writes a ZIP archive from members that were compressed somewhere else.
+
+	zipfile compresses every member on the thread that writes it. This writer
+	only lays out headers and copies bytes, so members can be deflated on other
+	threads and appended here in any order. Members of unknown compressed size
+	are streamed with beginMember/write/endMember, and their local header is
+	patched afterwards, so no data descriptors are needed. Zip64 records are
+	added for large members, offsets and member counts. The archive goes to a
+	new file at path, or to fileobj when given, which needs write, tell and seek.
+	"""
+
+	def __init__(self, path, fileobj=None):
+		self.path = path
+		self._file = fileobj if fileobj is not None else open(path, "wb")
+		self._members = []
+		self._open = None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		if excType is None:
+			self.close()
+		else:
+			self._file.close()
+
+	def _encodeName(self, arcname):
+		name = arcname.replace(os.sep, "/").lstrip("/")
+		try:
+			return name.encode("ascii"), 0
+		except UnicodeEncodeError:
+			return name.encode("utf-8"), FLAG_UTF8
+
+	def _writeLocalHeader(self, name, flags, method, mtime, crc, compressedSize, fileSize, zip64):
+		dosTime, dosDate = _dosDateTime(mtime)
+		offset = self._file.tell()
+		if zip64:
+			extra = struct.pack("<2H2Q", ZIP64_EXTRA_ID, 16, fileSize, compressedSize)
+			header = LOCAL_HEADER.pack(b"PK\x03\x04", VERSION_ZIP64, 0, flags, method, dosTime, dosDate, crc, 0xFFFFFFFF, 0xFFFFFFFF, len(name), len(extra))
+		else:
+			extra = b""
+			header = LOCAL_HEADER.pack(b"PK\x03\x04", VERSION_DEFAULT, 0, flags, method, dosTime, dosDate, crc, compressedSize, fileSize, len(name), 0)
+		self._file.write(header + name + extra)
+		return _Member(name, flags, method, dosTime, dosDate, crc, compressedSize, fileSize, offset)
+
+	def addMember(self, arcname, mtime, method, crc, compressedSize, fileSize, source):
+		"""Append a member whose compressedSize compressed bytes are read from the file object source."""
+		name, flags = self._encodeName(arcname)
+		zip64 = compressedSize > ZIP64_LIMIT or fileSize > ZIP64_LIMIT
+		member = self._writeLocalHeader(name, flags, method, mtime, crc, compressedSize, fileSize, zip64)
+		remaining = compressedSize
+		while remaining:
+			data = source.read(min(COPY_BUFFER_SIZE, remaining))
+			if not data:
+				raise EOFError(f"Compressed data of {arcname} ended early")
+			self._file.write(data)
+			remaining -= len(data)
+		self._members.append(member)
+
+	def beginMember(self, arcname, mtime, method, expectedSize):
+		"""Start a member whose compressed bytes follow through write()."""
+		name, flags = self._encodeName(arcname)
+		# Deflate can grow incompressible data slightly, so leave room as zipfile does
+		zip64 = expectedSize * 1.05 > ZIP64_LIMIT
+		self._open = (self._writeLocalHeader(name, flags, method, mtime, 0, 0, 0, zip64), zip64)
+
+	def write(self, data):
+		self._file.write(data)
+
+	def endMember(self, crc, compressedSize, fileSize):
+		member, zip64 = self._open
+		self._open = None
+		if not zip64 and (compressedSize > ZIP64_LIMIT or fileSize > ZIP64_LIMIT):
+			raise zipfile.LargeZipFile(f"{member.name!r} grew past the Zip64 limit while it was compressed")
+		end = self._file.tell()
+		self._file.seek(member.offset + LOCAL_CRC_OFFSET)
+		if zip64:
+			self._file.write(struct.pack("<L", crc))
+			self._file.seek(member.offset + LOCAL_HEADER.size + len(member.name) + 4)
+			self._file.write(struct.pack("<2Q", fileSize, compressedSize))
+		else:
+			self._file.write(struct.pack("<3L", crc, compressedSize, fileSize))
+		self._file.seek(end)
+		self._members.append(member._replace(crc=crc, compressedSize=compressedSize, fileSize=fileSize))
+
+	def _writeCentralHeader(self, member):
+		fields = []
+		fileSize = member.fileSize
+		compressedSize = member.compressedSize
+		offset = member.offset
+		if fileSize > ZIP64_LIMIT:
+			fields.append(fileSize)
+			fileSize = 0xFFFFFFFF
+		if compressedSize > ZIP64_LIMIT:
+			fields.append(compressedSize)
+			compressedSize = 0xFFFFFFFF
+		if offset > ZIP64_LIMIT:
+			fields.append(offset)
+			offset = 0xFFFFFFFF
+		extra = b""
+		version = VERSION_DEFAULT
+		if fields:
+			extra = struct.pack(f"<2H{len(fields)}Q", ZIP64_EXTRA_ID, 8 * len(fields), *fields)
+			version = VERSION_ZIP64
+		header = CENTRAL_HEADER.pack(
+			b"PK\x01\x02", version, 0, version, 0, member.flags, member.method, member.dosTime, member.dosDate,
+			member.crc, compressedSize, fileSize, len(member.name), len(extra), 0, 0, 0, FILE_ATTRIBUTE_ARCHIVE, offset
+		)
+		self._file.write(header + member.name + extra)
+
+	def close(self):
+		if self._file.closed:
+			return
+		try:
+			centralOffset = self._file.tell()
+			for member in self._members:
+				self._writeCentralHeader(member)
+			centralSize = self._file.tell() - centralOffset
+			count = len(self._members)
+			if count > ZIP_FILECOUNT_LIMIT or centralOffset > ZIP64_LIMIT or centralSize > ZIP64_LIMIT:
+				zip64EndOffset = self._file.tell()
+				self._file.write(ZIP64_END_RECORD.pack(b"PK\x06\x06", ZIP64_END_RECORD.size - 12, VERSION_ZIP64, VERSION_ZIP64, 0, 0, count, count, centralSize, centralOffset))
+				self._file.write(ZIP64_END_LOCATOR.pack(b"PK\x06\x07", 0, zip64EndOffset, 1))
+				count = min(count, 0xFFFF)
+				centralSize = min(centralSize, 0xFFFFFFFF)
+				centralOffset = min(centralOffset, 0xFFFFFFFF)
+			self._file.write(END_RECORD.pack(b"PK\x05\x06", 0, 0, count, count, centralSize, centralOffset, 0))
+		finally:
+			self._file.close()
@@ -0,0 +1,47 @@
+# test_sizeIndex.py
+# Run from the repository root with NVDA's source folder on PYTHONPATH:
+# python -m unittest discover tests
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "addon", "globalPlugins"))
+
+from xPlorer import sizeIndex  # noqa: E402
+
+
+class SizeIndexRulesTest(unittest.TestCase):
+
+	def setUp(self):
+		self.root = tempfile.mkdtemp()
+		self.folder = os.path.join(self.root, "tree")
+		os.makedirs(os.path.join(self.folder, "logs"))
+		with open(os.path.join(self.folder, "keep.txt"), "wb") as f:
+			f.write(b"k" * 11)
+		with open(os.path.join(self.folder, "trace.log"), "wb") as f:
+			f.write(b"x" * 1500)
+		self.indexFile = os.path.join(self.root, "index", "sizeindex.json")
+		self.config = mock.patch.object(sizeIndex, "loadConfig", return_value={"exclusionPatterns": "*.log;logs/"})
+		self.config.start()
+
+	def tearDown(self):
+		self.config.stop()
+		shutil.rmtree(self.root, ignore_errors=True)
+
+	def test_lookupBeforeMeasureUsesConfiguredRules(self):
+		index = sizeIndex.SizeIndex(self.indexFile)
+		node = index.lookup(self.folder)
+		self.assertEqual((node.totalBytes, node.fileCount, len(node.subdirs)), (11, 1, 0))
+		index.save()
+		reloaded = sizeIndex.SizeIndex(self.indexFile)
+		node = reloaded.lookup(self.folder)
+		self.assertEqual((node.totalBytes, node.fileCount, len(node.subdirs)), (11, 1, 0))
+		self.assertEqual(reloaded.measure(self.folder), (11, 1, 0))
+
+
+if __name__ == "__main__":
+	unittest.main()